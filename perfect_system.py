@@ -1,22 +1,34 @@
 # perfect_system.py - PDF Placeholder Sistemi (TR-UNICODE OPTIMIZED)
 import os
+import asyncio
 import json
 import uuid
 import unicodedata
 import re
-from typing import Dict, List, Optional, Any, Tuple
+import bisect
+import functools
+import logging
+import multiprocessing
+from collections import Counter
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, List, Optional, Any, Tuple, Iterator, Callable, TypeVar, Union
 from pathlib import Path
+import shutil
 import ssl
+import urllib.parse
 import urllib.request
 
 import fitz  # PyMuPDF
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse, JSONResponse, HTMLResponse
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi.responses import FileResponse, JSONResponse, HTMLResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 
 app = FastAPI(title="Perfect PDF Placeholder System")
 
+# Döngü içi tanılama mesajları DEBUG seviyesinde; varsayılan yapılandırmada maliyetsiz atlanır
+logger = logging.getLogger(__name__)
+
 # ============================ CORS ============================
 app.add_middleware(
     CORSMiddleware,
@@ -30,6 +42,31 @@ app.add_middleware(
 SESSIONS: Dict[str, Dict] = {}
 SESSION_DIR = Path("perfect_sessions")
 SESSION_DIR.mkdir(exist_ok=True)
+# Yüklenen dosyaların diske kopyalanmasında kullanılan parça boyutu
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Bu boyuta kadar yüklemeler bellekten açılır (diske yazma arka planda); üstü diske akıtılır
+INMEMORY_OPEN_MAX = 20 << 20
+# Tam kayıt seçenekleri: redaksiyonun bıraktığı sahipsiz eski içerik akışları atılır (garbage=1),
+# yeni yazılan sıkıştırılmamış akışlar sıkıştırılır; zaten sıkıştırılmış font/görsel akışlarına dokunulmaz
+SAVE_OPTIONS: Dict[str, Any] = {"garbage": 1, "deflate": True}
+
+
+def _open_copy_for_fill(src: str, out_path: Path) -> fitz.Document:
+    """Temizlenmiş PDF'i çıktı yoluna kopyala ve oradan aç (artımlı kayıt için)"""
+    shutil.copyfile(src, out_path)
+    return fitz.open(str(out_path))
+
+
+def _save_filled(doc: fitz.Document, out_path: Path) -> None:
+    """Dolum yalnızca içerik eklediği için belgeyi kendi dosyasına artımlı kaydet.
+    Artımlı kayıt mümkün değilse (onarılmış/şifreli belge) tam yazıp dosyayı değiştir.
+    """
+    if doc.can_save_incrementally():
+        doc.save(str(out_path), incremental=True, encryption=fitz.PDF_ENCRYPT_KEEP)
+        return
+    tmp_path = out_path.with_name(out_path.name + ".tmp")
+    doc.save(str(tmp_path), **SAVE_OPTIONS)
+    os.replace(tmp_path, out_path)
 
 # ============================ Font bootstrap (Unicode TR) ============================
 FONTS_DIR = Path("fonts")
@@ -99,6 +136,74 @@ def ensure_tr_font() -> Path:
     raise RuntimeError("Türkçe için uygun TTF/OTF font indirilemedi / bulunamadı.")
 
 
+# fonts/ altındaki .ttf/.otf listesi: taranan klasörlerin mtime'ları değişmedikçe yeniden gezilmez
+_FONT_FILES_CACHE: Dict[str, Any] = {"stamp": None, "dirs": [], "files": []}
+
+
+def _dir_stamp(dirs: List[Path]) -> Tuple[int, ...]:
+    stamp = []
+    for d in dirs:
+        try:
+            stamp.append(d.stat().st_mtime_ns)
+        except OSError:
+            stamp.append(-1)
+    return tuple(stamp)
+
+
+def _local_font_files() -> List[Path]:
+    """FONTS_DIR altındaki (alt klasörler dahil) .ttf/.otf dosyaları, glob sırasıyla.
+    Dosya eklenip silinince klasörün mtime'ı değiştiğinden önbellek kendiliğinden yenilenir;
+    her çağrıda tüm ağaç yerine yalnızca klasörler stat edilir."""
+    cache = _FONT_FILES_CACHE
+    if cache["stamp"] is not None and _dir_stamp(cache["dirs"]) == cache["stamp"]:
+        return cache["files"]
+    dirs: List[Path] = [FONTS_DIR]
+    files: List[Path] = []
+    try:
+        for fp in FONTS_DIR.glob("**/*"):
+            if fp.is_dir():
+                dirs.append(fp)
+            elif fp.suffix.lower() in (".ttf", ".otf"):
+                files.append(fp)
+    except Exception:
+        pass
+    cache["dirs"], cache["files"], cache["stamp"] = dirs, files, _dir_stamp(dirs)
+    return files
+
+
+# Varsayılan Türkçe TTF arama sırası (FONTS_DIR kökünde)
+TR_FONT_PRIORITIES: Tuple[str, ...] = (
+    "DejaVuSans.ttf",           # Ana font
+    "NotoSans-Regular.ttf",     # Google font
+    "OpenSans-Regular.ttf",     # Popüler web font
+    "OpenSans-SemiBold.ttf",    # Semi-bold variant
+    "Roboto-Regular.ttf",       # Material design
+    "Ubuntu-Regular.ttf",       # Ubuntu font
+    "PTSans-Regular.ttf",       # PT Sans
+    "BebasNeue-Regular.ttf",    # Modern display
+    "Anton-Regular.ttf",        # Display font
+    "Gravity-Regular.otf",      # Gravity regular
+    "Gravity-Bold.otf",         # Gravity bold
+    "Amble-Regular.ttf",        # Amble regular
+    "Amble-Bold.ttf",           # Amble bold
+    "CaviarDreams.ttf",         # Caviar Dreams
+    "LemonMilklight.otf",       # Lemon Milk
+    "Akrobat-Regular.otf",      # Akrobat
+    "TTimesb.ttf",              # Times variant
+)
+
+
+def _get_turkish_fontfile() -> Optional[str]:
+    """Öncelik sırasındaki ilk mevcut Türkçe fontun yolu.
+    Varlık kontrolü önbellekli font listesinden yapılır; her çağrıda dosya başına stat atılmaz."""
+    available = set(_local_font_files())
+    for font_name in TR_FONT_PRIORITIES:
+        font_path = FONTS_DIR / font_name
+        if font_path in available:
+            return str(font_path)
+    return None
+
+
 def register_tr_font(doc: fitz.Document) -> str:
     """Unicode destekli TTF fontu (DejaVu Sans) belgede embed et ve alias döndür.
 
@@ -240,9 +345,89 @@ def _norm_color(c: Any) -> Tuple[float, float, float]:
     except Exception:
         pass
     return (0.0, 0.0, 0.0)
-   
+
+
+def _line_char_runs(raw: Dict[str, Any]) -> Iterator[Tuple[str, List[Tuple[float, float, float, float]], List[Dict], List[int]]]:
+    """rawdict satırlarını (satır metni, karakter bbox listesi, span'lar, span başlangıçları) olarak akıtır.
+    Metindeki i. karakterin kutusu listenin i. elemanıdır; span sınırları birleştirilir.
+    span_starts[j], spans[j]'nin satır metnindeki ilk karakter ofsetidir (bisect ile aranır).
+    Generator: sayfanın tüm satırları önceden listelenmez, her satır taranıp bırakılır."""
+    for block in raw.get("blocks", []):
+        if block.get("type", 0) != 0:
+            continue
+        for line in block.get("lines", []):
+            chars: List[str] = []
+            boxes: List[Tuple[float, float, float, float]] = []
+            spans: List[Dict] = []
+            span_starts: List[int] = []
+            for span in line.get("spans", []):
+                span_chars = span.get("chars", [])
+                if not span_chars:
+                    continue
+                spans.append(span)
+                span_starts.append(len(chars))
+                for ch in span_chars:
+                    chars.append(ch.get("c", ""))
+                    boxes.append(tuple(ch.get("bbox", (0, 0, 0, 0))))
+            if chars:
+                yield "".join(chars), boxes, spans, span_starts
+
+
+def _union_char_bounds(boxes: List[Tuple[float, float, float, float]]) -> Tuple[float, float, float, float]:
+    """Karakter kutularının birleşimi (x0, y0, x1, y1) demeti olarak.
+    Koordinatlar tek zip ile sütunlara ayrılır; min/max dört ayrı generator yerine C'de döner."""
+    x0s, y0s, x1s, y1s = zip(*boxes)
+    return min(x0s), min(y0s), max(x1s), max(y1s)
+
+
+def _union_char_boxes(boxes: List[Tuple[float, float, float, float]]) -> fitz.Rect:
+    """Karakter kutularının birleşimi"""
+    if not boxes:
+        return fitz.Rect()
+    return fitz.Rect(_union_char_bounds(boxes))
+
+
+def _build_line_y_index(lines: List[Tuple[str, List[Tuple[float, float, float, float]], Tuple[float, float, float, float]]]
+                        ) -> Tuple[List[float], List[int], float]:
+    """Satırları üst kenara (y0) göre sıralar: (sıralı y0'lar, satır numaraları, en büyük satır yüksekliği).
+    _text_in_area her alan için tüm satırları gezmek yerine bisect ile aday penceresine atlar."""
+    order = sorted(range(len(lines)), key=lambda i: lines[i][2][1])
+    y0s = [lines[i][2][1] for i in order]
+    max_h = max((ly1 - ly0 for _t, _b, (_x0, ly0, _x1, ly1) in lines), default=0.0)
+    return y0s, order, max_h
+
+
+def _text_in_area(lines: List[Tuple[str, List[Tuple[float, float, float, float]], Tuple[float, float, float, float]]],
+                  area: fitz.Rect,
+                  y_index: Optional[Tuple[List[float], List[int], float]] = None) -> str:
+    """Page.get_textbox ile aynı kural: alanla (kenar hariç) kesişen karakterler, satırlar "\n" ile.
+    lines: (satır metni, karakter kutuları, satır sınırı); zaten ayrıştırılmış rawdict'ten çalışır,
+    her çağrıda sayfadaki tüm karakterleri yeniden gezmez.
+    y_index: _build_line_y_index çıktısı; verilirse yalnızca dikeyde alana yetişebilen satırlara bakılır
+    (sonuç okuma sırasını korur)."""
+    ax0, ay0, ax1, ay1 = area.x0, area.y0, area.x1, area.y1
+    if y_index is not None:
+        y0s, order, max_h = y_index
+        # y0 < ay1 ve y1 > ay0 olabilecek satırlar: y0 aralığı (ay0 - max_h, ay1)
+        lo = bisect.bisect_right(y0s, ay0 - max_h)
+        hi = bisect.bisect_left(y0s, ay1)
+        candidates = [lines[i] for i in sorted(order[lo:hi])]
+    else:
+        candidates = lines
+    parts: List[str] = []
+    for text, boxes, (lx0, ly0, lx1, ly1) in candidates:
+        # Satır sınırı kesişmiyorsa satırdaki hiçbir karakter kesişmez
+        if ly0 >= ay1 or ly1 <= ay0 or lx0 >= ax1 or lx1 <= ax0:
+            continue
+        picked = [text[k] for k, (x0, y0, x1, y1) in enumerate(boxes)
+                  if y0 < ay1 and y1 > ay0 and x0 < ax1 and x1 > ax0]
+        if picked:
+            parts.append("".join(picked))
+    return "\n".join(parts)
+
 
 # ============================ Font style helpers (bold/italic) ============================
+@functools.lru_cache(maxsize=1024)
 def _family_from_stem(stem: str) -> str:
     s = stem
     # Remove common weight/style tokens
@@ -336,9 +521,7 @@ def pick_variant_fontfile(preferred_fontfile: Optional[str], style: str, collect
     except Exception:
         base_family = None
     candidates = []
-    for fp in FONTS_DIR.glob("**/*"):
-        if not fp.suffix.lower() in (".ttf", ".otf"): 
-            continue
+    for fp in _local_font_files():
         stem = fp.stem
         family = _family_from_stem(stem)
         if base_family and family and family.lower() != base_family.lower():
@@ -393,6 +576,32 @@ def builtin_fontname_for_style(style: str) -> str:
     return "Helvetica"
 
 
+# ============================ Page text cache ============================
+# dict/rawdict varsayılanları resim bloklarını (piksel verisiyle) da çözer; metin taramaları
+# resim bloklarını zaten atladığı için bu bayrak kapatılır.
+TEXT_FLAGS_NO_IMAGES = fitz.TEXTFLAGS_DICT & ~fitz.TEXT_PRESERVE_IMAGES
+# Page.search_for'un varsayılan bayrakları; sayfa başına bir kez kurulan TextPage bunlarla açılır
+TEXT_FLAGS_SEARCH = (fitz.TEXT_DEHYPHENATE | fitz.TEXT_PRESERVE_WHITESPACE |
+                     fitz.TEXT_PRESERVE_LIGATURES | fitz.TEXT_MEDIABOX_CLIP)
+
+
+def _get_page_rawdict(page: fitz.Page) -> Dict:
+    """Sayfanın rawdict çıktısını (görseller hariç) döndürür."""
+    return page.get_text("rawdict", flags=TEXT_FLAGS_NO_IMAGES)
+
+
+def _get_page(doc: fitz.Document, pno: int, cache: Optional[Dict[int, fitz.Page]] = None) -> fitz.Page:
+    """doc[pno]; cache verilirse her sayfa yalnızca bir kez yüklenir ve aynı sayfadaki
+    placeholder'lar (ekleme, redaksiyon) aynı Page nesnesi üzerinden işlenir."""
+    if cache is None:
+        return doc[pno]
+    page = cache.get(pno)
+    if page is None:
+        page = doc[pno]
+        cache[pno] = page
+    return page
+
+
 # ============================ Style inference helper ============================
 def _infer_style_near_rect(page: fitz.Page, rect: fitz.Rect) -> Dict[str, Any]:
     """Rect etrafındaki span'lardan font, size ve color'ı tahmin eder.
@@ -466,34 +675,75 @@ def _expand_rect_to_line(page: fitz.Page, rect: fitz.Rect) -> fitz.Rect:
     return rect
 
 
-def _expand_rect_to_line(page: fitz.Page, rect: fitz.Rect) -> fitz.Rect:
+def _build_line_index(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """rawdict satırlarının (span birleşimi) bbox'larını y0'a göre sıralı tutar.
+    Dikey aralık sorgusu bisect ile O(log N + K) olur; her sorguda tüm satırlar gezilmez."""
+    lines: List[Tuple[float, int, float, float, float]] = []  # (y0, okuma sırası, x0, x1, y1)
+    for block in raw.get("blocks", []):
+        if block.get("type", 0) != 0:
+            continue
+        for line in block.get("lines", []):
+            spans = line.get("spans", [])
+            if not spans:
+                continue
+            lx0 = ly0 = float('inf')
+            lx1 = ly1 = float('-inf')
+            for sp in spans:
+                x0, y0, x1, y1 = sp.get("bbox", (0, 0, 0, 0))
+                if x0 < lx0:
+                    lx0 = x0
+                if y0 < ly0:
+                    ly0 = y0
+                if x1 > lx1:
+                    lx1 = x1
+                if y1 > ly1:
+                    ly1 = y1
+            lines.append((ly0, len(lines), lx0, lx1, ly1))
+    lines.sort()
+    # En yüksek satır: y1 > q.y0 olan her satırın y0'ı q.y0 - max_h'den büyüktür
+    max_h = max((max(0.0, ln[4] - ln[0]) for ln in lines), default=0.0)
+    return {"lines": lines, "y0s": [ln[0] for ln in lines], "max_h": max_h}
+
+
+def _get_page_line_index(page: fitz.Page, cache: Optional[Dict[int, Dict]] = None) -> Dict[str, Any]:
+    """Sayfanın satır indeksini döndürür; cache verilirse sayfa başına bir kez kurulur."""
+    if cache is None:
+        return _build_line_index(_get_page_rawdict(page))
+    index = cache.get(page.number)
+    if index is None:
+        index = _build_line_index(_get_page_rawdict(page))
+        cache[page.number] = index
+    return index
+
+
+def _expand_rect_to_line(page: fitz.Page, rect: fitz.Rect, line_cache: Optional[Dict[int, Dict]] = None) -> fitz.Rect:
     """Verilen küçük rect'i, ait olduğu satırın tüm genişliğine genişletmeye çalışır.
     Eğer satır bulunamazsa, güvenli bir minimum genişlik ile yatayda genişletir."""
     try:
-        raw = page.get_text("rawdict")
+        index = _get_page_line_index(page, line_cache)
+        lines = index["lines"]
+        y0s = index["y0s"]
         best_line_bbox = None
         best_area = 0.0
-        for block in raw.get("blocks", []):
-            if block.get("type", 0) != 0:
+        best_order = -1
+        # Yalnızca rect'in dikey aralığına düşebilecek satırlar (y0 < rect.y1, y1 > rect.y0)
+        lo = bisect.bisect_left(y0s, rect.y0 - index["max_h"])
+        hi = bisect.bisect_left(y0s, rect.y1)
+        rx0, ry0, rx1, ry1 = rect.x0, rect.y0, rect.x1, rect.y1
+        for i in range(lo, hi):
+            ly0, order, lx0, lx1, ly1 = lines[i]
+            if ly1 <= ry0:
                 continue
-            for line in block.get("lines", []):
-                # Satır bbox'unu topla
-                lb = [float('inf'), float('inf'), float('-inf'), float('-inf')]
-                spans = line.get("spans", [])
-                if not spans:
-                    continue
-                for sp in spans:
-                    x0, y0, x1, y1 = sp.get("bbox", (0, 0, 0, 0))
-                    lb[0] = min(lb[0], x0)
-                    lb[1] = min(lb[1], y0)
-                    lb[2] = max(lb[2], x1)
-                    lb[3] = max(lb[3], y1)
-                line_rect = fitz.Rect(lb)
-                inter = line_rect & rect
-                area = inter.get_area()
-                if area > best_area:
-                    best_area = area
-                    best_line_bbox = line_rect
+            # Kesişim alanı düz float aritmetiğiyle (aday başına fitz.Rect kurulmaz);
+            # boş kesişim fitz'teki gibi 0 alan sayılır
+            w = min(lx1, rx1) - max(lx0, rx0)
+            h = min(ly1, ry1) - max(ly0, ry0)
+            area = w * h if w > 0 and h > 0 else 0.0
+            # Eşit alanda okuma sırasında önce gelen satır kazanır
+            if area > best_area or (area > 0 and area == best_area and order < best_order):
+                best_area = area
+                best_order = order
+                best_line_bbox = fitz.Rect(lx0, ly0, lx1, ly1)
         if best_line_bbox and best_area > 0:
             # Biraz padding ekle
             pad = 2.0
@@ -518,6 +768,32 @@ def _expand_rect_to_line(page: fitz.Page, rect: fitz.Rect) -> fitz.Rect:
 
 
 # ============================ Font Analysis System ============================
+def _extract_font_summary(doc: fitz.Document, xref: int, pno: int) -> Optional[Dict[str, Any]]:
+    """Gömülü fontu bir kez çıkarır; TTF/OTF ise diske yazar (ilk görüldüğü sayfanın adıyla).
+    Gömülü değilse veya çıkarılamazsa None döner."""
+    try:
+        ext, buf, realname = doc.extract_font(xref)
+    except Exception:
+        return None
+    if not buf or len(buf) <= 1024:
+        return None
+    summary: Dict[str, Any] = {
+        "size_bytes": len(buf),
+        "extension": ext or "unknown",
+        "real_name": realname,
+        "file_path": None,
+    }
+    # TTF/OTF ise kaydet
+    if ext and ext.lower() in (".ttf", ".otf"):
+        try:
+            temp_path = FONTS_DIR / f"extracted_{pno}_{xref}{ext}"
+            temp_path.write_bytes(buf)
+            summary["file_path"] = str(temp_path)
+        except Exception:
+            pass
+    return summary
+
+
 def analyze_pdf_fonts(doc: fitz.Document) -> Dict[str, Any]:
     """PDF'deki tüm fontları analiz eder ve detaylarını döndürür"""
     font_analysis = {
@@ -530,8 +806,11 @@ def analyze_pdf_fonts(doc: fitz.Document) -> Dict[str, Any]:
     
     print("PDF FONT ANALYSIS STARTING...")
     
+    # xref -> gömülü font özeti (None: gömülü değil/çıkarılamadı). Aynı font çoğu sayfada tekrarlanır;
+    # akış yalnızca ilk görüldüğünde açılıp diske yazılır
+    extracted: Dict[int, Optional[Dict[str, Any]]] = {}
+    
     for pno in range(len(doc)):
-        page = doc[pno]
         page_fonts = []
         
         try:
@@ -555,25 +834,19 @@ def analyze_pdf_fonts(doc: fitz.Document) -> Dict[str, Any]:
                     "file_path": None
                 }
                 
-                # Embedded font kontrolü
-                try:
-                    ext, buf, realname = doc.extract_font(xref)
-                    if buf and len(buf) > 1024:
-                        font_detail["is_embedded"] = True
-                        font_detail["extractable"] = True
-                        font_detail["size_bytes"] = len(buf)
-                        font_detail["extension"] = ext or "unknown"
-                        font_detail["real_name"] = realname or fontname
-                        
-                        # TTF/OTF ise kaydet
-                        if ext and ext.lower() in (".ttf", ".otf"):
-                            temp_path = FONTS_DIR / f"extracted_{pno}_{xref}{ext}"
-                            temp_path.write_bytes(buf)
-                            font_detail["file_path"] = str(temp_path)
-                            font_analysis["embedded_fonts"].append(font_detail)
-                        
-                except Exception:
-                    pass
+                # Embedded font kontrolü (xref başına bir kez)
+                if xref not in extracted:
+                    extracted[xref] = _extract_font_summary(doc, xref, pno)
+                summary = extracted[xref]
+                if summary is not None:
+                    font_detail["is_embedded"] = True
+                    font_detail["extractable"] = True
+                    font_detail["size_bytes"] = summary["size_bytes"]
+                    font_detail["extension"] = summary["extension"]
+                    font_detail["real_name"] = summary["real_name"] or fontname
+                    if summary["file_path"]:
+                        font_detail["file_path"] = summary["file_path"]
+                        font_analysis["embedded_fonts"].append(font_detail)
                 
                 if not font_detail["is_embedded"]:
                     font_analysis["system_fonts"].append(font_detail)
@@ -591,8 +864,10 @@ def analyze_pdf_fonts(doc: fitz.Document) -> Dict[str, Any]:
     # Font önerileri oluştur
     if font_analysis["embedded_fonts"]:
         # En yaygın embedded font
-        embedded_names = [f["basename"] or f["name"] for f in font_analysis["embedded_fonts"]]
-        most_common = max(set(embedded_names), key=embedded_names.count) if embedded_names else None
+        # Tek geçişte sayım (her ad için listeyi yeniden sayan max(set, key=count) yerine);
+        # eşitlikte ilk görülen ad seçilir
+        embedded_counts = Counter(f["basename"] or f["name"] for f in font_analysis["embedded_fonts"])
+        most_common = embedded_counts.most_common(1)[0][0] if embedded_counts else None
         
         font_analysis["recommendations"]["primary_embedded"] = most_common
         font_analysis["recommendations"]["use_embedded"] = True
@@ -601,8 +876,8 @@ def analyze_pdf_fonts(doc: fitz.Document) -> Dict[str, Any]:
     
     # Sistem fontları için öneri
     if font_analysis["system_fonts"]:
-        system_names = [f["basename"] or f["name"] for f in font_analysis["system_fonts"]]
-        most_common_system = max(set(system_names), key=system_names.count) if system_names else None
+        system_counts = Counter(f["basename"] or f["name"] for f in font_analysis["system_fonts"])
+        most_common_system = system_counts.most_common(1)[0][0] if system_counts else None
         font_analysis["recommendations"]["primary_system"] = most_common_system
     
     print(f"FONT ANALYSIS COMPLETE: {len(font_analysis['all_fonts'])} fonts found")
@@ -681,9 +956,7 @@ def get_font_config_for_placeholder(font_analysis: Dict[str, Any], placeholder:
             print(f"Using local TTF fallback: {config['original_name']}")
             return config
     try:
-        for fp in FONTS_DIR.glob("**/*"):
-            if fp.suffix.lower() not in (".ttf", ".otf"):
-                continue
+        for fp in _local_font_files():
             if fp.exists():
                 config = {
                     "fontfile": str(fp),
@@ -770,8 +1043,26 @@ PH_PATTERNS = [
 # Ana pattern (geriye uyumluluk için)
 PH_RE = PH_PATTERNS[0]
 
-# Türkçe karakter tespiti
-TR_CHARS = set("çğıöşüÇĞİÖŞÜ")
+# Konum bazlı tespit pattern'leri (öncelik sırasıyla - en spesifik önce)
+POSITION_PATTERNS: List[Tuple[str, str]] = [
+    (r'\{\{([A-Za-z_][A-Za-z0-9_]*)\}\}', "{{Ad}}"),
+    (r'\[\[([A-Za-z_][A-Za-z0-9_]*)\]\]', "[[Ad]]"),
+    (r'%([A-Za-z_][A-Za-z0-9_]*)%', "%Ad%"),
+    (r'@([A-Za-z_][A-Za-z0-9_]*)@', "@Ad@"),
+    (r'#([A-Za-z_][A-Za-z0-9_]*)#', "#Ad#"),
+    # Tek parantezli pattern'ler çift parantezlilerle çakıştığı için kapalı
+    # (r'\{([A-Za-z_][A-Za-z0-9_]*)\}', "{Ad}"),
+    # (r'\[([A-Za-z_][A-Za-z0-9_]*)\]', "[Ad]"),
+]
+
+# Tüm pattern'ler tek alternasyonda: sayfa metni bir kez taranır, eşleşen dal lastgroup ile bulunur
+POSITION_RE = re.compile("|".join(f"(?P<p{i}>{pat})" for i, (pat, _name) in enumerate(POSITION_PATTERNS)))
+
+# Ön eleme: pattern'lerin açılış işaretlerinden hiçbiri yoksa sayfada placeholder olamaz
+POSITION_GATE_RE = re.compile(r'\{\{|\[\[|[%@#]')
+
+# Unicode font yokken kullanılan Türkçe -> ASCII karşılıkları (str.translate tablosu)
+TR_ASCII_TABLE = str.maketrans("çğıöşüÇĞİÖŞÜ", "cgiosuCGIOSU")
 
 # Basit font dosya önbelleği: xref -> path
 _EMBED_CACHE: Dict[int, str] = {}
@@ -814,70 +1105,70 @@ def _extract_placeholder_fontfile(doc: fitz.Document, pno: int, original_font: s
     except Exception:
         return None
 
-def _autosize_font_to_rect(text: str, rect: fitz.Rect, fontfile: str, start: float = 12.0) -> float:
-    """Verilen fontfile ile metnin, dikdörtgene sığacağı en büyük font boyutunu bul.
-    Geçici bir dokümanda insert_textbox ile ölçer (leftover==0 => sığdı).
-    """
-    try:
-        low, high = 4.0, max(start * 2.0, rect.height * 2.0)
-        # Hızlı büyütme: start uygunsa low=start yap
-        tmp = fitz.open()
-        p = tmp.new_page(width=rect.width, height=rect.height)
-        box = fitz.Rect(0, 0, rect.width, rect.height)
-        left = p.insert_textbox(box, text, fontname="embedded", fontfile=fontfile, fontsize=start, align=fitz.TEXT_ALIGN_CENTER)
-        tmp.close()
-        if left == 0:
-            low = start
-        # İkili arama ile en iyi değeri bul
-        for _ in range(12):
-            mid = (low + high) / 2.0
-            tmp = fitz.open()
-            p = tmp.new_page(width=rect.width, height=rect.height)
-            box = fitz.Rect(0, 0, rect.width, rect.height)
-            left = p.insert_textbox(box, text, fontname="embedded", fontfile=fontfile, fontsize=mid, align=fitz.TEXT_ALIGN_CENTER)
-            tmp.close()
-            if left == 0:
-                low = mid
-            else:
-                high = mid
-        return max(4.0, round(low, 2))
-    except Exception:
-        return max(6.0, start)
+_FONT_OBJ_CACHE: Dict[str, fitz.Font] = {}
+
+
+def _get_font_obj(fontfile: str) -> fitz.Font:
+    """fontfile (veya "Helvetica" gibi Base-14 adı) için fitz.Font; süreç başına bir kez kurulur"""
+    font = _FONT_OBJ_CACHE.get(fontfile)
+    if font is None:
+        if fontfile.lower() in fitz.Base14_fontdict:
+            font = fitz.Font(fontname=fontfile)
+        else:
+            font = fitz.Font(fontfile=fontfile)
+        _FONT_OBJ_CACHE[fontfile] = font
+    return font
+
+
+@functools.lru_cache(maxsize=4096)
+def _text_advance(fontfile: str, text: str) -> float:
+    """Metnin 1pt'deki tipografik genişliği (glyph ilerlemeleri toplamı).
+    Genişlik puntoyla doğrusal olduğundan boyut anahtara girmez."""
+    return _get_font_obj(fontfile).text_length(text, fontsize=1.0)
+
 
 def _fit_singleline_font_to_rect(text: str, rect: fitz.Rect, fontfile: str, start: float = 12.0) -> float:
-    """Tek satırda kalacak şekilde (boşlukları NBSP yaparak) kutuya sığan maksimum fontu bulur.
-    Genişlik sınırı ana kısıttır; yükseklik için ayrıca clamp yapılmalıdır."""
+    """Tek satırda kalacak şekilde (boşlukları NBSP yaparak) kutuya sığan en büyük fontu bulur.
+    Genişlik font metriklerinden kapalı formda hesaplanır; sonuç start'ı (yüksekliğe göre
+    seçilmiş boyut) aşmaz; insert_textbox'ın tek satır yükseklik sınırı da uygulanır."""
     try:
+        font = _get_font_obj(fontfile)
+        # insert_textbox tek satırı fontsize * (ascender - 2*descender) <= rect.height ise çizer
+        line_factor = font.ascender - 2 * font.descender
+        if line_factor > 0:
+            start = min(start, rect.height * 0.99 / line_factor)
         t = (text or "").replace(" ", "\u00A0")
-        low, high = 4.0, max(start * 2.5, rect.height * 3.0)
-        # Başlangıç kontrolü
-        tmp = fitz.open()
-        p = tmp.new_page(width=rect.width, height=max(10.0, rect.height * 6.0))
-        box = fitz.Rect(0, 0, rect.width, p.rect.height)
-        left = p.insert_textbox(box, t, fontname="embedded", fontfile=fontfile, fontsize=start, align=fitz.TEXT_ALIGN_CENTER)
-        tmp.close()
-        if left == 0:
-            low = start
-        for _ in range(14):
-            mid = (low + high) / 2.0
-            tmp = fitz.open()
-            p = tmp.new_page(width=rect.width, height=max(10.0, rect.height * 6.0))
-            box = fitz.Rect(0, 0, rect.width, p.rect.height)
-            left = p.insert_textbox(box, t, fontname="embedded", fontfile=fontfile, fontsize=mid, align=fitz.TEXT_ALIGN_CENTER)
-            tmp.close()
-            if left == 0:
-                low = mid
-            else:
-                high = mid
-        return max(4.0, round(low, 2))
+        unit_width = _text_advance(fontfile, t)
+        if unit_width <= 0:
+            return max(4.0, round(start, 2))
+        # %2 pay: yuvarlama sonrası textbox'ın satırı kaydırıp metni düşürmemesi için
+        return max(4.0, round(min(start, rect.width * 0.98 / unit_width), 2))
     except Exception:
         return max(6.0, start)
 
-def needs_unicode(s: str) -> bool:
-    try:
-        return bool(s) and any((ord(ch) > 127) or (ch in TR_CHARS) for ch in s)
-    except Exception:
-        return True
+
+# Latin-1 olarak okunmuş UTF-8 izleri ('Ã§' zaten 'Ã' içerir) - tek geçişte arama
+_HAS_MOJIBAKE = re.compile(r'[ÃÅ]').search
+# Yaygın mojibake düzeltmeleri - GELİŞTİRİLMİŞ (modül düzeyinde bir kez kurulur)
+_TURKISH_FIXES: Dict[str, str] = {
+    # Mojibake onarımları
+    "ÄŸ": "ğ", "Ã„ÂŸ": "ğ", "Ã¤Å¸": "ğ", "Ä°Å¸": "ğ", "Ä±Å¸": "ğ",
+    "Ä±": "ı", "Ã„Â±": "ı", "Ã±": "ı", "Ä°Â±": "ı", "Ä°": "İ",
+    "ÅŸ": "ş", "Ã…Å¸": "ş", "Ã…Åž": "Ş", "Ã…Â": "ş", "Å": "Ş",
+    "Ã§": "ç", "Ã‡": "Ç", "Ãƒ§": "ç", "Ãƒ‡": "Ç",
+    "Ã¼": "ü", "Ãœ": "Ü", "Ãƒ¼": "ü", "Ãƒœ": "Ü",
+    "Ã¶": "ö", "Ã–": "Ö", "Ãƒ¶": "ö", "Ãƒ–": "Ö",
+    "Äž": "Ğ", "Ã„Å¾": "Ğ", "ÄˆÄ°": "İ",
+    
+    # UTF-8 problemleri
+    "Ä±Ã": "ı", "ÄÃ": "ğ", "ÅÃ": "ş", "Ã¼Ã": "ü", "Ã§Ã": "ç", "Ã¶Ã": "ö",
+    "Ã„Â±": "ı", "Ã…Å¸": "ş", "Ã„ÂŸ": "ğ",
+    
+    # Windows-1254 -> UTF-8 problemleri
+    "Ã‡": "Ç", "Ã–": "Ö", "Ãœ": "Ü", "Ä°": "İ", "Ä±": "ı", "ÅŸ": "ş"
+}
+# Tüm düzeltme anahtarları bu harflerden biriyle başlar; hiçbiri yoksa değiştirme turu atlanır
+_HAS_FIXABLE = re.compile(r'[ÃÄÅ]').search
 
 
 def normalize_turkish_text(text: Any) -> str:
@@ -889,11 +1180,17 @@ def normalize_turkish_text(text: Any) -> str:
             text = str(text)
         except Exception:
             return ""
+    return _normalize_turkish_str(text)
+
 
+@functools.lru_cache(maxsize=4096)
+def _normalize_turkish_str(text: str) -> str:
+    """normalize_turkish_text'in str çekirdeği; tekrarlanan değerler (aynı anahtarın birden çok
+    konumu) yeniden normalize edilmez."""
     # 1. Önce encoding sorunlarını düzelt
     try:
         # Eğer metin latin-1 olarak kodlanmışsa UTF-8'e çevir
-        if any(c in text for c in ['Ã§', 'Ã', 'Å']):
+        if _HAS_MOJIBAKE(text):
             try:
                 # Latin-1 decode, UTF-8 encode dene
                 text = text.encode('latin-1').decode('utf-8')
@@ -902,63 +1199,25 @@ def normalize_turkish_text(text: Any) -> str:
     except:
         pass
 
-    # 2. Yaygın mojibake düzeltmeleri - GELİŞTİRİLMİŞ
-    turkish_fixes = {
-        # Mojibake onarımları
-        "ÄŸ": "ğ", "Ã„ÂŸ": "ğ", "Ã¤Å¸": "ğ", "Ä°Å¸": "ğ", "Ä±Å¸": "ğ",
-        "Ä±": "ı", "Ã„Â±": "ı", "Ã±": "ı", "Ä°Â±": "ı", "Ä°": "İ",
-        "ÅŸ": "ş", "Ã…Å¸": "ş", "Ã…Åž": "Ş", "Ã…Â": "ş", "Å": "Ş",
-        "Ã§": "ç", "Ã‡": "Ç", "Ãƒ§": "ç", "Ãƒ‡": "Ç",
-        "Ã¼": "ü", "Ãœ": "Ü", "Ãƒ¼": "ü", "Ãƒœ": "Ü",
-        "Ã¶": "ö", "Ã–": "Ö", "Ãƒ¶": "ö", "Ãƒ–": "Ö",
-        "Äž": "Ğ", "Ã„Å¾": "Ğ", "ÄˆÄ°": "İ",
-        
-        # UTF-8 problemleri
-        "Ä±Ã": "ı", "ÄÃ": "ğ", "ÅÃ": "ş", "Ã¼Ã": "ü", "Ã§Ã": "ç", "Ã¶Ã": "ö",
-        "Ã„Â±": "ı", "Ã…Å¸": "ş", "Ã„ÂŸ": "ğ",
-        
-        # Windows-1254 -> UTF-8 problemleri
-        "Ã‡": "Ç", "Ã–": "Ö", "Ãœ": "Ü", "Ä°": "İ", "Ä±": "ı", "ÅŸ": "ş"
-    }
-    
-    # Her türlü encoding sorunu için çoklu geçiş
-    for _ in range(3):  # Maksimum 3 geçiş
-        old_text = text
-        for wrong, correct in turkish_fixes.items():
-            text = text.replace(wrong, correct)
-        if text == old_text:  # Değişiklik yoksa dur
-            break
+    # 2. Yaygın mojibake düzeltmeleri: her türlü encoding sorunu için çoklu geçiş
+    if _HAS_FIXABLE(text):
+        for _ in range(3):  # Maksimum 3 geçiş
+            old_text = text
+            for wrong, correct in _TURKISH_FIXES.items():
+                text = text.replace(wrong, correct)
+            if text == old_text:  # Değişiklik yoksa dur
+                break
 
     # 3. NFC normalize (aksanları birleştir)
-    try:
-        text = unicodedata.normalize("NFC", text)
-    except Exception:
-        pass
+    text = unicodedata.normalize("NFC", text)
 
-    # 4. Karakter temizleme ve doğrulama
-    cleaned_text = ""
-    for char in text:
-        char_code = ord(char)
-        if char_code < 128:  # ASCII karakterler - güvenli
-            cleaned_text += char
-        elif char in "çğıöşüÇĞİÖŞÜâîûêôûıİĞğŞşÇçÖöÜü":  # Türkçe + diğer unicode
-            cleaned_text += char
-        elif 128 <= char_code <= 65535:  # Geçerli Unicode aralığı
-            cleaned_text += char
-        else:
-            # Tanınmayan karakter için ASCII yakınını bul
-            ascii_map = {
-                'ğ': 'g', 'ş': 's', 'ü': 'u', 'ç': 'c', 'ı': 'i', 'ö': 'o',
-                'Ğ': 'G', 'Ş': 'S', 'Ü': 'U', 'Ç': 'C', 'İ': 'I', 'Ö': 'O'
-            }
-            cleaned_text += ascii_map.get(char, char)
+    # 4. Karakter karakter "temizleme" döngüsü kaldırıldı: tüm BMP karakterlerini koruyordu ve
+    # BMP dışı karakterler için ASCII tablosunda karşılık olmadığından metni hiç değiştirmiyordu
 
-    # 5. Son kontrol ve düzenleme
-    if cleaned_text != text:
-        print(f"🔧 Text düzeltildi: '{text[:50]}...' -> '{cleaned_text[:50]}...'")
-    
-    print(f"🇹🇷 PERFECT Turkish normalized: '{cleaned_text}'")
-    return cleaned_text
+    # 5. Son kontrol - her değer için çağrılır; biçimleme yalnızca DEBUG'da
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🇹🇷 PERFECT Turkish normalized: '%s'", text)
+    return text
 
 
 def _dedupe_placeholders(ph_list: List[Dict]) -> List[Dict]:
@@ -977,123 +1236,236 @@ def _dedupe_placeholders(ph_list: List[Dict]) -> List[Dict]:
 
 
 # ============================ Placeholder Detection ============================
-def _get_font_info_at_position(page: fitz.Page, rect: fitz.Rect) -> Tuple[str, float, int, tuple]:
-    """Belirli pozisyondaki font bilgilerini al"""
-    try:
-        # Rect içindeki span'ları bul
-        raw = page.get_text("rawdict")
-        for block in raw.get("blocks", []):
-            if block.get("type", 0) != 0:
+def _span_font_info(span: Dict) -> Tuple[str, float, int, tuple]:
+    """Span'ın font adı, boyutu, bayrakları ve rengi"""
+    return (span.get("font", "helvetica"), span.get("size", 12), span.get("flags", 0),
+            _norm_color(span.get("color", (0, 0, 0))))
+
+
+def _scan_page_placeholders(page: fitz.Page, page_num: int,
+                            protected_areas: Optional[Dict[int, List[Dict]]] = None) -> List[Dict]:
+    """Tek sayfadaki placeholder adaylarını (bbox, bağlam, font bilgisiyle) okuma sırasında döndürür.
+    Sonuç yalnızca düz veri içerir; alt süreçten ana sürece aktarılabilir.
+    protected_areas verilirse placeholder bulunan sayfanın korunan alanları aynı rawdict'ten eklenir."""
+    logger.debug("📄 Page %d", page_num + 1)
+    found: List[Dict] = []
+    # Sayfa içeriği tek bir TextPage'e bir kez yorumlanır; düz metin kontrolü ve rawdict
+    # aynı nesneden okunur
+    textpage = page.get_textpage(flags=TEXT_FLAGS_NO_IMAGES)
+    # Ucuz düz metin kontrolü: işaret yoksa pahalı rawdict ayrıştırmasına gerek yok
+    if not POSITION_GATE_RE.search(textpage.extractText()):
+        return found
+    # Sayfa başına tek rawdict: satır taraması, glyph bbox'ları ve span fontları aynı veriden
+    raw = page.get_text("rawdict", textpage=textpage)
+    # Satırlar bağlam metni için de gerektiğinden bir kez listelenir (sınır kutusuyla birlikte)
+    runs = list(_line_char_runs(raw))
+    # _line_char_runs boş satır üretmez; sınır doğrudan demet olarak alınır (ara fitz.Rect yok)
+    lines = [(text, boxes, _union_char_bounds(boxes)) for text, boxes, _spans, _starts in runs]
+    line_y_index = _build_line_y_index(lines)
+    
+    for line_text, char_boxes, line_spans, span_starts in runs:
+        # Satırların çoğunda açılış işareti yok: tek karakter sınıfı araması alternasyonlu
+        # regex'i başlatmaktan ~5 kat ucuz
+        if not POSITION_GATE_RE.search(line_text):
+            continue
+        for match in POSITION_RE.finditer(line_text):
+            # p{i} grubu i. pattern'dir; iç yakalama grubu hemen ardından gelir
+            pattern_idx = int(match.lastgroup[1:])
+            pattern_name = POSITION_PATTERNS[pattern_idx][1]
+            base_key = match.group(2 * pattern_idx + 2).strip()
+            full_match = match.group(0)
+            
+            # Skip invalid keys (anahtar biçimi POSITION_PATTERNS'in yakalama grubunca zaten
+            # doğrulanmış; eşleşme başına ikinci bir regex çalıştırılmaz)
+            if not base_key or len(base_key) < 2:
                 continue
-            for line in block.get("lines", []):
-                for span in line.get("spans", []):
-                    span_rect = fitz.Rect(span["bbox"])
-                    # Overlap kontrolü
-                    if span_rect.intersects(rect):
-                        font_name = span.get("font", "helvetica")
-                        font_size = span.get("size", 12)
-                        font_flags = span.get("flags", 0)
-                        font_color = _norm_color(span.get("color", (0, 0, 0)))
-                        return font_name, font_size, font_flags, font_color
-    except Exception as e:
-        print(f"⚠️ Font info extraction error: {e}")
-    
-    # Default values
-    return "helvetica", 12, 0, (0, 0, 0)
-
-
-def detect_placeholders_position_based(doc: fitz.Document) -> List[Dict]:
-    """POSITION-BASED PLACEHOLDER DETECTION - Her pozisyon için unique key"""
+            
+            # Gerçek glyph kutularından bbox (search_for ile sayfayı yeniden aramadan)
+            rect = _union_char_boxes(char_boxes[match.start():match.end()])
+            if rect.is_empty:
+                continue
+            
+            # Get context for better identification
+            try:
+                expanded = fitz.Rect(rect.x0-40, rect.y0-8, rect.x1+40, rect.y1+8)
+                context = _text_in_area(lines, expanded, line_y_index).strip()
+                context = context.replace('\n', ' ').replace('\r', ' ')
+            except:
+                context = ""
+            
+            # Font bilgisi eşleşmenin ilk karakterini taşıyan span'dan (satır ofsetinde bisect);
+            # sıkı satır aralığında komşu satırın span'ı seçilmez
+            try:
+                span = line_spans[bisect.bisect_right(span_starts, match.start()) - 1]
+                font_name, font_size, font_flags, font_color = _span_font_info(span)
+                font_info = {
+                    "fontname": font_name,
+                    "size": font_size,
+                    "flags": font_flags,
+                    "color": font_color
+                }
+            except Exception as e:
+                logger.warning("⚠️ Font info extraction error: %s", e)
+                font_info = {"fontname": "Unknown", "size": 12.0, "flags": 0, "color": (0, 0, 0)}
+            
+            found.append({
+                'base_key': base_key,
+                'text': full_match,
+                'pattern': pattern_name,
+                'page': page_num,
+                'rect': [rect.x0, rect.y0, rect.x1, rect.y1],
+                'context': context,
+                'original_font': font_info.get("fontname", "Unknown"),
+                'original_size': font_info.get("size", 12.0),
+                'original_flags': font_info.get("flags", 0),
+                'original_color': font_info.get("color", (0, 0, 0))
+            })
+    if found and protected_areas is not None:
+        protected_areas[page_num] = _page_protected_areas(raw, page_num)
+    return found
+
+
+# Aynı noktadan sayılan iki eşleşme arasındaki en büyük köşe farkı (pt)
+_OCCUPIED_CELL = 5.0
+
+
+# ============================ Parallel page scan ============================
+# Ölçüm (sıcak havuz): sıralı tarama sayfa başına 0.3-1.3 ms; her aralık (alt süreçte belgeyi
+# yeniden açma, fontları ısıtma, sonucu geri taşıma) 1.5-2.2 ms ek maliyet. İşçi başına tek aralıkla
+# W işçide kazanç N*c*(1-1/W) > ~2*W ms olur; en ucuz sayfalarda (0.3 ms) 8 işçi için başabaş ~61 sayfa.
+# İşçi başına 4 aralıkla 30 sayfalık belgede paralel 0.107 s, sıralı 0.060 s ölçülmüştü.
+# İşçi sayısı belgeye göre seçilir: her işçiye en az 32 sayfa (en ucuz sayfalarda ~10 ms iş,
+# ~2 ms aralık maliyetinin beş katı); paralel tarama 64 sayfada (iki işçi) başlar.
+_PAGES_PER_WORKER = 32
+# Üst sınır: süre ~ N*c/W + 2*W ms, en iyi W ~ sqrt(N*c/2); 8 işçi ancak ~250+ sayfada
+# (c=1 ms) kazandırır, ötesinde her süreç belgeyi ayrıca açtığından yalnız bellek artar.
+# Tek çekirdekli makinelerde değer 1'dir: havuz hiç kurulmaz, açılıştaki ısıtma da atlanır.
+_DETECT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+_DETECT_POOL: Optional[ProcessPoolExecutor] = None
+
+
+def _init_detect_worker() -> None:
+    """Alt süreç başlatıcısı: referansı çözülürken bu modül (fitz, pattern'ler) alt süreçte içe
+    aktarılır; ilk tarama isteği bu içe aktarmayı beklemez."""
+
+
+def _get_detect_pool() -> ProcessPoolExecutor:
+    """Tarama süreç havuzunu ilk ihtiyaçta kurar ve istekler arasında yeniden kullanır.
+    spawn: çok iş parçacıklı sunucu sürecinden fork edilmez."""
+    global _DETECT_POOL
+    if _DETECT_POOL is None:
+        _DETECT_POOL = ProcessPoolExecutor(
+            max_workers=_DETECT_MAX_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_detect_worker,
+        )
+    return _DETECT_POOL
+
+
+@app.on_event("startup")
+def _warm_detect_pool() -> None:
+    """Süreç havuzunu açılışta başlatır: spawn ve modül içe aktarımı (ilk çağrıda saniyeler)
+    ilk büyük belgeyi tarayan isteğe yüklenmez. Beklenmez; açılış gecikmez."""
+    if _DETECT_MAX_WORKERS > 1:
+        pool = _get_detect_pool()
+        # spawn havuzu alt süreçleri iş geldikçe açar: işçi başına bir boş iş hepsini başlatır
+        for _ in range(_DETECT_MAX_WORKERS):
+            pool.submit(_init_detect_worker)
+
+
+@app.on_event("shutdown")
+def _shutdown_detect_pool() -> None:
+    if _DETECT_POOL is not None:
+        _DETECT_POOL.shutdown(wait=False, cancel_futures=True)
+
+
+def _detect_workers_for(page_count: int) -> int:
+    """Belge için tarama işçisi sayısı; 2'den azsa sıralı taranır"""
+    return min(_DETECT_MAX_WORKERS, page_count // _PAGES_PER_WORKER)
+
+
+def _scan_page_range(pdf_path: str, start: int, stop: int) -> Tuple[List[Dict], Dict[int, List[Dict]]]:
+    """Alt süreç girişi: belgeyi kendisi açar ve [start, stop) sayfalarını tarar"""
+    with fitz.open(pdf_path) as doc:
+        found: List[Dict] = []
+        protected_areas: Dict[int, List[Dict]] = {}
+        for page_num in range(start, stop):
+            found.extend(_scan_page_placeholders(doc[page_num], page_num, protected_areas))
+        return found, protected_areas
+
+
+def _scan_pages_parallel(pdf_path: str, page_count: int, workers: int,
+                         protected_areas: Optional[Dict[int, List[Dict]]] = None) -> List[Dict]:
+    """Sayfaları bitişik aralıklara bölüp süreç havuzunda tarar; sonuç sayfa sırasını korur"""
+    # İşçi başına tek bitişik aralık: her aralık belgeyi yeniden açtığından aralık sayısı
+    # ek maliyeti belirler (bkz. _PAGES_PER_WORKER)
+    step = max(1, -(-page_count // workers))
+    starts = list(range(0, page_count, step))
+    stops = [min(st + step, page_count) for st in starts]
+    pool = _get_detect_pool()
+    found: List[Dict] = []
+    for chunk, chunk_areas in pool.map(_scan_page_range, [pdf_path] * len(starts), starts, stops):
+        found.extend(chunk)
+        if protected_areas is not None:
+            protected_areas.update(chunk_areas)
+    return found
+
+
+def detect_placeholders_position_based(doc: fitz.Document, source_path: Optional[str] = None,
+                                       protected_areas: Optional[Dict[int, List[Dict]]] = None) -> List[Dict]:
+    """POSITION-BASED PLACEHOLDER DETECTION - Her pozisyon için unique key.
+    source_path: belge bellekten açıldıysa aynı içeriğin diskteki kopyası (paralel tarama için).
+    protected_areas: verilirse silme aşaması için sayfa başına korunan alanlarla doldurulur."""
     print("🎯 POSITION-BASED PLACEHOLDER DETECTION")
     
-    # Patterns with priority (most specific first to avoid duplicates)
-    patterns = [
-        (r'\{\{([A-Za-z_][A-Za-z0-9_]*)\}\}', "{{Ad}}"),  # Highest priority - most specific
-        (r'\[\[([A-Za-z_][A-Za-z0-9_]*)\]\]', "[[Ad]]"),
-        (r'%([A-Za-z_][A-Za-z0-9_]*)%', "%Ad%"),
-        (r'@([A-Za-z_][A-Za-z0-9_]*)@', "@Ad@"),
-        (r'#([A-Za-z_][A-Za-z0-9_]*)#', "#Ad#"),
-        # Skip single bracket patterns that might conflict with double brackets
-        # (r'\{([A-Za-z_][A-Za-z0-9_]*)\}', "{Ad}"),    # Commented out to avoid conflicts
-        # (r'\[([A-Za-z_][A-Za-z0-9_]*)\]', "[Ad]"),    # Commented out to avoid conflicts  
-    ]
+    page_count = len(doc)
+    candidates: Optional[List[Dict]] = None
+    pdf_path = source_path or doc.name
+    # Büyük, diskte değişmemiş belgeler çok çekirdekte taranır (PyMuPDF GIL'i bırakmaz)
+    workers = _detect_workers_for(page_count)
+    if (workers > 1 and pdf_path and os.path.isfile(pdf_path) and not doc.is_dirty):
+        try:
+            candidates = _scan_pages_parallel(pdf_path, page_count, workers, protected_areas)
+        except Exception as e:
+            logger.warning("⚠️ Parallel scan failed, falling back to sequential: %s", e)
+            candidates = None
+    if candidates is None:
+        candidates = []
+        for page_num in range(page_count):
+            candidates.extend(_scan_page_placeholders(doc[page_num], page_num, protected_areas))
     
     placeholders = []
-    occupied_areas = []  # Track covered areas
-    
-    for page_num in range(len(doc)):
-        page = doc[page_num]
-        print(f"📄 Page {page_num + 1}")
+    # Track covered areas - sol üst köşeler sayfa başına _OCCUPIED_CELL'lik ızgara hücrelerinde
+    # tutulur; her aday yalnızca komşu 3x3 hücredeki köşelerle karşılaştırılır (O(N²) tarama yok)
+    occupied_cells: Dict[Tuple[int, int, int], List[Tuple[float, float]]] = {}
+    
+    for placeholder in candidates:
+        page_num = placeholder['page']
+        x0, y0 = placeholder['rect'][0], placeholder['rect'][1]
+        cx, cy = int(x0 // _OCCUPIED_CELL), int(y0 // _OCCUPIED_CELL)
+        
+        # Check if this area overlaps with already processed areas (aynı sayfada)
+        is_overlapping = False
+        for nx in (cx - 1, cx, cx + 1):
+            for ny in (cy - 1, cy, cy + 1):
+                for ox0, oy0 in occupied_cells.get((page_num, nx, ny), ()):
+                    if abs(x0 - ox0) < _OCCUPIED_CELL and abs(y0 - oy0) < _OCCUPIED_CELL:
+                        is_overlapping = True
+                        break
+                if is_overlapping:
+                    break
+            if is_overlapping:
+                break
         
-        for pattern_re, pattern_name in patterns:
-            page_text = page.get_text()
-            matches = re.finditer(pattern_re, page_text)
+        if is_overlapping:
+            logger.debug("   ⏭️ Skipping '%s' at (%.1f, %.1f) - overlaps with previous", placeholder['text'], x0, y0)
+            continue
             
-            for match in matches:
-                base_key = match.group(1).strip()
-                full_match = match.group(0)
-                
-                # Skip invalid keys
-                if not base_key or len(base_key) < 2:
-                    continue
-                if not re.match(r'^[A-Za-z_][A-Za-z0-9_]*$', base_key):
-                    continue
-                
-                # Find all visual instances
-                instances = page.search_for(full_match)
-                
-                for rect in instances:
-                    # Check if this area overlaps with already processed areas
-                    is_overlapping = False
-                    for occupied_rect in occupied_areas:
-                        if (abs(rect.x0 - occupied_rect.x0) < 5 and 
-                            abs(rect.y0 - occupied_rect.y0) < 5):
-                            is_overlapping = True
-                            print(f"   ⏭️ Skipping '{full_match}' at ({rect.x0:.1f}, {rect.y0:.1f}) - overlaps with previous")
-                            break
-                    
-                    if is_overlapping:
-                        continue
-                        
-                    # Mark this area as occupied
-                    occupied_areas.append(rect)
-                    
-                    # Get context for better identification
-                    try:
-                        expanded = fitz.Rect(rect.x0-40, rect.y0-8, rect.x1+40, rect.y1+8)
-                        context = page.get_textbox(expanded).strip()
-                        context = context.replace('\n', ' ').replace('\r', ' ')
-                    except:
-                        context = ""
-                    
-                    # Get font info
-                    try:
-                        font_name, font_size, font_flags, font_color = _get_font_info_at_position(page, rect)
-                        font_info = {
-                            "fontname": font_name,
-                            "size": font_size,
-                            "flags": font_flags,
-                            "color": font_color
-                        }
-                    except Exception as e:
-                        print(f"⚠️ Font info extraction error: {e}")
-                        font_info = {"fontname": "Unknown", "size": 12.0, "flags": 0, "color": (0, 0, 0)}
-                    
-                    placeholder = {
-                        'base_key': base_key,
-                        'text': full_match,
-                        'pattern': pattern_name,
-                        'page': page_num,
-                        'rect': [rect.x0, rect.y0, rect.x1, rect.y1],
-                        'context': context,
-                        'original_font': font_info.get("fontname", "Unknown"),
-                        'original_size': font_info.get("size", 12.0),
-                        'original_flags': font_info.get("flags", 0),
-                        'original_color': font_info.get("color", (0, 0, 0))
-                    }
-                    
-                    placeholders.append(placeholder)
-                    print(f"   ✅ Found '{full_match}' at ({rect.x0:.1f}, {rect.y0:.1f})")
+        # Mark this area as occupied
+        occupied_cells.setdefault((page_num, cx, cy), []).append((x0, y0))
+        
+        placeholders.append(placeholder)
+        logger.debug("   ✅ Found '%s' at (%.1f, %.1f)", placeholder['text'], x0, y0)
     
     # Group by base_key and assign position indexes
     key_groups = {}
@@ -1129,304 +1501,169 @@ def detect_placeholders_position_based(doc: fitz.Document) -> List[Dict]:
             
             final_placeholders.append(ph)
             
-            print(f"   🎯 Assigned: '{unique_key}' -> '{display_name + position_label}'")
+            logger.debug("   🎯 Assigned: '%s' -> '%s%s'", unique_key, display_name, position_label)
     
     print(f"🎯 Detection complete: {len(final_placeholders)} positioned placeholders")
     return final_placeholders
-    """🎯 OPTIMIZED PLACEHOLDER DETECTION - Zero Duplicates, Maximum Coverage"""
-    placeholders: List[Dict] = []
-    found_positions = set()  # Pozisyon bazında duplicate kontrolü
-    
-    print("� OPTIMIZED placeholder detection starting...")
-    print(f"🎯 Patterns to scan: {len(PH_PATTERNS)}")
-    
-    # Pattern isimleri
-    PATTERN_NAMES = [
-        "{{Ad}}", "{ {Ad} }", "{Ad}", "[[Ad]]", "[ [Ad] ]", "[Ad]", 
-        "((Ad))", "( (Ad) )", "{{{Ad}}}", "{[Ad]}", "[{Ad}]", 
-        "${Ad}", "%{Ad}%", "@{Ad}", "#{Ad}"
-    ]
-    
-    for pno in range(len(doc)):
-        page = doc[pno]
-        print(f"📄 Scanning page {pno + 1}...")
-        
-        # SMART SINGLE-PASS DETECTION
-        try:
-            # 1) Tüm text'i al
-            page_text = page.get_text()
-            print(f"📝 Page text length: {len(page_text)} characters")
-            
-            # 2) Her pattern için bir kere tara
-            for pattern_idx, pattern in enumerate(PH_PATTERNS):
-                pattern_name = PATTERN_NAMES[pattern_idx]
-                
-                for match in pattern.finditer(page_text):
-                    key = match.group(1).strip()
-                    full_match = match.group(0)
-                    start_pos = match.start()
-                    end_pos = match.end()
-                    
-                    # FALSE POSITIVE FILTERING - Güvenli pattern kontrolü
-                    is_false_positive = False
-                    reasons = []
-                    
-                    # 1) Geçersiz karakterler (bracket'lar key içinde)
-                    if any(c in key for c in '{}[]()'):
-                        is_false_positive = True
-                        reasons.append(f"Invalid chars in key: '{key}'")
-                    
-                    # 2) Kısa büyük harf/sayı kombinasyonları
-                    elif key.isalnum() and (key.isupper() or key.isdigit()) and len(key) <= 4:
-                        is_false_positive = True
-                        reasons.append(f"Short uppercase/digit: '{key}'")
-                    
-                    # 3) Yaygın kelimeler
-                    elif key.upper() in {'NEW', 'OLD', 'YES', 'NO', 'TOP', 'END', 'ALL', 'ANY', 'HOW', 'WHO', 'WHAT'}:
-                        is_false_positive = True
-                        reasons.append(f"Common word: '{key}'")
-                    
-                    # 4) Tek karakter
-                    elif len(key) == 1:
-                        is_false_positive = True
-                        reasons.append(f"Single char: '{key}'")
-                    
-                    # 5) Sadece sayı
-                    elif key.isdigit():
-                        is_false_positive = True
-                        reasons.append(f"Number only: '{key}'")
-                    
-                    if is_false_positive:
-                        print(f"⏭️ SKIP false positive: '{full_match}' → key: '{key}' | {', '.join(reasons)}")
-                        continue
-                    
-                    # Smart duplicate kontrolü - sadece TAM aynı match'leri skip et
-                    match_signature = f"{pno}_{start_pos}_{end_pos}_{full_match}_{pattern_name}"
-                    if match_signature in found_positions:
-                        print(f"⏭️ SKIP exact duplicate: '{full_match}' at position {start_pos}-{end_pos}")
-                        continue
-                    
-                    found_positions.add(match_signature)
-                    
-                    # Exact bbox bulma
-                    text_instances = page.search_for(full_match)
-                    if text_instances:
-                        # Multiple instances olabilir - hepsini kontrol et
-                        for bbox_idx, bbox in enumerate(text_instances):
-                            # Unique signature for each bbox
-                            bbox_signature = f"{pno}_{bbox.x0:.1f}_{bbox.y0:.1f}_{bbox.x1:.1f}_{bbox.y1:.1f}_{full_match}"
-                            
-                            # Bu position'da bu text zaten processed mi?
-                            if bbox_signature in found_positions:
-                                print(f"⏭️ SKIP processed bbox: '{full_match}' at ({bbox.x0:.1f}, {bbox.y0:.1f})")
-                                continue
-                            
-                            found_positions.add(bbox_signature)
-                            
-                            # Span-level font info'yu almaya çalış
-                            font_name, font_size, font_flags, font_color = _get_font_info_at_position(
-                                page, bbox
-                            )
-                            
-                            placeholder = {
-                                "key": key,
-                                "text": full_match,
-                                "pattern": pattern_name,
-                                "page": pno,
-                                "rect": [bbox.x0, bbox.y0, bbox.x1, bbox.y1],
-                                "original_font": font_name,
-                                "original_size": font_size,
-                                "original_flags": font_flags,
-                                "original_color": font_color,
-                                "suggestion": f"Örnek_{key}"
-                            }
-                            
-                            placeholders.append(placeholder)
-                            print(f"✅ FOUND: '{full_match}' → key: '{key}' (pattern: {pattern_name}) at ({bbox.x0:.1f}, {bbox.y0:.1f})")
-                    
-                    else:
-                        # Fallback: Text bulundu ama bbox yok
-                        print(f"⚠️ Pattern found but no bbox: '{full_match}' → key: '{key}'")
-        
-        except Exception as e:
-            print(f"⚠️ Detection error on page {pno + 1}: {e}")
-    
-    # INTELLIGENT deduplication: Aynı key'in multiple instances'larını destekle
-    final_placeholders = []
-    processed_positions = set()
-    
-    for ph in placeholders:
-        key = ph['key']
-        page = ph['page']
-        rect = ph['rect']
-        
-        # Sadece temiz key'leri kabul et (garip karakterler değil)
-        if not key or key.startswith('{') or key.startswith('[') or key.startswith('(') or key.endswith('}') or key.endswith(']') or key.endswith(')'):
-            print(f"⏭️ SKIP invalid key: '{key}' (contains brackets)")
-            continue
-        
-        # Position-based duplicate kontrolü (aynı yerde tekrar etmesin)
-        position_key = f"{page}_{rect[0]:.1f}_{rect[1]:.1f}_{rect[2]:.1f}_{rect[3]:.1f}"
-        if position_key in processed_positions:
-            print(f"⏭️ SKIP duplicate position: '{key}' at ({rect[0]:.1f}, {rect[1]:.1f})")
-            continue
-        
-        processed_positions.add(position_key)
-        
-        # Unique ID ekle (aynı key'in farklı instance'ları için)
-        ph['instance_id'] = f"{key}_page{page}_pos{rect[0]:.0f}x{rect[1]:.0f}"
-        
-        final_placeholders.append(ph)
-        print(f"✅ ACCEPTED: '{key}' at page {page+1}, position ({rect[0]:.1f}, {rect[1]:.1f})")
-    
-    placeholders = final_placeholders
-    
-    print(f"🎯 OPTIMIZED detection complete: {len(placeholders)} unique placeholders")
-    print("📋 FINAL RESULTS:")
-    for ph in sorted(placeholders, key=lambda x: (x['page'], x['key'])):
-        rect = ph['rect']
-        print(f"   📍 Page {ph['page'] + 1}: '{ph['key']}' = '{ph['text']}' (pattern: {ph['pattern']}) at ({rect[0]:.1f}, {rect[1]:.1f})")
-    
-    return placeholders
 
 
 # ============================ Removal (Redaction) ============================
-def physically_remove_placeholders(doc: fitz.Document, placeholders: List[Dict]) -> fitz.Document:
-    """🎯 SAFE PLACEHOLDER REMOVAL - Skips placeholders that might damage other content"""
+# Silme sırasında korunacak büyük, tek başına metinler ("NEW" gibi)
+_PROTECTED_MIN_SIZE = 30
+_PROTECTED_MAX_LEN = 5
+_MARKUP_CHARS_RE = re.compile(r'[{}\[\]()@#$%]')
+
+
+def _find_overlapping_area(areas: List[Dict], rect: Any) -> Optional[Dict]:
+    """rect ([x0,y0,x1,y1] veya fitz.Rect) ile kesişen ilk alanı döndürür"""
+    x0, y0, x1, y1 = rect
+    for area in areas:
+        ax0, ay0, ax1, ay1 = area['rect']
+        # Önce y ekseni: farklı satırlardaki alanlar ilk karşılaştırmada elenir
+        if y0 < ay1 and y1 > ay0 and x0 < ax1 and x1 > ax0:
+            return area
+    return None
+
+
+def _nearest_search_hit(page: fitz.Page, text: str, near: List[float],
+                        textpages: Dict[int, Tuple[fitz.Page, fitz.TextPage, Dict[str, List[fitz.Rect]]]]) -> Optional[fitz.Rect]:
+    """Sayfada text'i arar ve near rect'inin merkezine en yakın isabeti döndürür.
+    Redaksiyon notları metni değiştirmez; sayfanın TextPage'i ve aynı metnin isabetleri
+    tüm aramalarda paylaşılır (TextPage sayfaya zayıf referans tutar; sayfa nesnesi de saklanır)."""
+    cached = textpages.get(page.number)
+    if cached is None:
+        cached = (page, page.get_textpage(flags=TEXT_FLAGS_SEARCH), {})
+        textpages[page.number] = cached
+    search_page, textpage, hits_by_text = cached
+    hits = hits_by_text.get(text)
+    if hits is None:
+        hits = search_page.search_for(text, quads=False, textpage=textpage)
+        hits_by_text[text] = hits
+    if not hits:
+        return None
+    cx = (near[0] + near[2]) / 2
+    cy = (near[1] + near[3]) / 2
+    # Kare mesafe yeterli (karekök sıralamayı değiştirmez); eşitlikte ilk eşleşme kalır
+    return min(hits, key=lambda r: ((r.x0 + r.x1) / 2 - cx) ** 2 + ((r.y0 + r.y1) / 2 - cy) ** 2)
+
+
+def _page_protected_areas(text_dict: Dict[str, Any], pno: int) -> List[Dict]:
+    """Sayfadaki büyük, tek başına metinler ("NEW" gibi); get_text("dict") veya "rawdict" çıktısından"""
+    areas: List[Dict] = []
+    for block in text_dict["blocks"]:
+        if "lines" in block:
+            for line in block["lines"]:
+                for span in line["spans"]:
+                    # Ucuz ve seçici koşul önce: çoğu span büyük puntolu değildir
+                    font_size = span["size"]
+                    if font_size <= _PROTECTED_MIN_SIZE:
+                        continue
+                    # rawdict span'ında metin yok, karakterlerden kurulur
+                    text = span["text"] if "text" in span else "".join(ch["c"] for ch in span["chars"])
+                    text = text.strip()
+                    bbox = span["bbox"]
+                    
+                    # Identify large, standalone text (like "NEW")
+                    if (len(text) <= _PROTECTED_MAX_LEN and text.isupper() and
+                            not _MARKUP_CHARS_RE.search(text)):
+                        areas.append({
+                            'page': pno,
+                            'text': text,
+                            'rect': tuple(bbox),
+                            'font_size': font_size
+                        })
+                        logger.debug("🛡️ IDENTIFIED PROBLEMATIC AREA: '%s' @ page %d, size %.1f", text, pno + 1, font_size)
+    return areas
+
+
+def physically_remove_placeholders(doc: fitz.Document, placeholders: List[Dict],
+                                   protected_areas: Optional[Dict[int, List[Dict]]] = None) -> None:
+    """🎯 SAFE PLACEHOLDER REMOVAL - Skips placeholders that might damage other content.
+    Belge yerinde değiştirilir; çağıran aynı belgeyi kaydedip kapatır.
+    protected_areas: tespit sırasında sayfa başına toplanan korunan alanlar (verilirse)."""
     if not placeholders:
         print("📄 No placeholders to remove")
-        return doc
+        return
 
     print(f"🧹 SAFE REMOVAL: {len(placeholders)} placeholders")
     
-    # First, identify potentially problematic areas (like "NEW" text)
-    problematic_areas = []
-    for pno in range(len(doc)):
-        page = doc[pno]
-        # Look for large, standalone text that shouldn't be damaged
-        text_dict = page.get_text("dict")
-        for block in text_dict["blocks"]:
-            if "lines" in block:
-                for line in block["lines"]:
-                    for span in line["spans"]:
-                        text = span["text"].strip()
-                        bbox = span["bbox"]
-                        font_size = span["size"]
-                        
-                        # Identify large, standalone text (like "NEW")
-                        if (len(text) <= 5 and text.isupper() and font_size > 30 and 
-                            not any(c in text for c in '{}[]()@#$%')):
-                            problematic_areas.append({
-                                'page': pno,
-                                'text': text,
-                                'rect': bbox,
-                                'font_size': font_size
-                            })
-                            print(f"� IDENTIFIED PROBLEMATIC AREA: '{text}' @ page {pno+1}, size {font_size:.1f}")
+    # First, identify potentially problematic areas (like "NEW" text) - sayfa bazında gruplanır
+    # Tespit aşaması kendi rawdict'inden çıkardıysa yeniden ayrıştırılmaz; eksik sayfalar
+    # (yalnızca placeholder içerenler) burada taranır
+    problematic_areas: Dict[int, List[Dict]] = dict(protected_areas or {})
+    # Sayfa başına tek Page nesnesi: redaksiyonlar eklendiği nesne üzerinden uygulanır
+    pages: Dict[int, fitz.Page] = {}
+    for pno in sorted({ph["page"] for ph in placeholders} - problematic_areas.keys()):
+        text_dict = _get_page(doc, pno, pages).get_text("dict", flags=TEXT_FLAGS_NO_IMAGES)
+        problematic_areas[pno] = _page_protected_areas(text_dict, pno)
     
     safe_removals = 0
     skipped_removals = 0
+    # Redaksiyon eklenen sayfalar: içerik akışı yalnızca bunlarda ve sayfa başına bir kez yeniden yazılır
+    redact_pages = set()
+    search_textpages: Dict[int, Tuple[fitz.Page, fitz.TextPage, Dict[str, List[fitz.Rect]]]] = {}
     
     for ph in placeholders:
         page_num = ph["page"]
         placeholder_text = ph["text"]
         full_rect = ph.get("rect", [0, 0, 0, 0])
-        page = doc[page_num]
-        
-        print(f"\n🎯 Processing '{placeholder_text}' from page {page_num + 1}")
-        
-        # Check for overlap with problematic areas
-        should_skip = False
-        for prob_area in problematic_areas:
-            if prob_area['page'] == page_num:
-                prob_rect = prob_area['rect']
-                # Check for overlap
-                if (full_rect[0] < prob_rect[2] and full_rect[2] > prob_rect[0] and 
-                    full_rect[1] < prob_rect[3] and full_rect[3] > prob_rect[1]):
-                    print(f"   ⚠️ OVERLAP DETECTED with '{prob_area['text']}' - SKIPPING for safety")
-                    should_skip = True
-                    skipped_removals += 1
-                    break
+        page = _get_page(doc, page_num, pages)
+        
+        logger.debug("🎯 Processing '%s' from page %d", placeholder_text, page_num + 1)
         
-        if should_skip:
+        # Check for overlap with problematic areas (yalnızca bu sayfanınkiler)
+        page_areas = problematic_areas.get(page_num, [])
+        prob_area = _find_overlapping_area(page_areas, full_rect)
+        if prob_area is not None:
+            logger.debug("   ⚠️ OVERLAP DETECTED with '%s' - SKIPPING for safety", prob_area['text'])
+            skipped_removals += 1
             continue
         
         try:
-            # SAFE APPROACH: Use direct search for exact placeholder text
-            placeholder_instances = page.search_for(placeholder_text)
+            # Tespit edilen rect, eşleşmenin rawdict glyph kutularının birleşimidir ve search_for'un
+            # en yakın isabetiyle aynı kutudur; sayfa metni yeniden ayrıştırılıp aranmaz
+            best_match: Optional[fitz.Rect] = fitz.Rect(full_rect)
+            if best_match.is_empty:
+                # SAFE APPROACH: Use direct search for exact placeholder text (rect taşımayan kayıtlar)
+                best_match = _nearest_search_hit(page, placeholder_text, full_rect, search_textpages)
             
-            if placeholder_instances:
-                # Find the closest match to our detected position
-                detected_center_x = (full_rect[0] + full_rect[2]) / 2
-                detected_center_y = (full_rect[1] + full_rect[3]) / 2
-                
-                best_match = None
-                min_distance = float('inf')
-                
-                for instance_rect in placeholder_instances:
-                    instance_center_x = (instance_rect.x0 + instance_rect.x1) / 2
-                    instance_center_y = (instance_rect.y0 + instance_rect.y1) / 2
-                    
-                    distance = ((detected_center_x - instance_center_x) ** 2 + 
-                               (detected_center_y - instance_center_y) ** 2) ** 0.5
-                    
-                    if distance < min_distance:
-                        min_distance = distance
-                        best_match = instance_rect
+            if best_match is not None:
+                # Double-check: This exact match won't overlap with problematic areas
+                safe_to_remove = True
+                prob_area = _find_overlapping_area(page_areas, best_match)
+                if prob_area is not None:
+                    logger.debug("   ⚠️ EXACT MATCH would overlap with '%s' - SKIPPING", prob_area['text'])
+                    safe_to_remove = False
+                    skipped_removals += 1
                 
-                if best_match:
-                    # Double-check: This exact match won't overlap with problematic areas
-                    safe_to_remove = True
-                    for prob_area in problematic_areas:
-                        if prob_area['page'] == page_num:
-                            prob_rect = prob_area['rect']
-                            if (best_match.x0 < prob_rect[2] and best_match.x1 > prob_rect[0] and 
-                                best_match.y0 < prob_rect[3] and best_match.y1 > prob_rect[1]):
-                                print(f"   ⚠️ EXACT MATCH would overlap with '{prob_area['text']}' - SKIPPING")
-                                safe_to_remove = False
-                                skipped_removals += 1
-                                break
+                if safe_to_remove:
+                    # Safe to remove - create minimal redaction
+                    safe_rect = fitz.Rect(
+                        best_match.x0 - 0.5, 
+                        best_match.y0 - 0.5, 
+                        best_match.x1 + 0.5, 
+                        best_match.y1 + 0.5
+                    )
                     
-                    if safe_to_remove:
-                        # Safe to remove - create minimal redaction
-                        safe_rect = fitz.Rect(
-                            best_match.x0 - 0.5, 
-                            best_match.y0 - 0.5, 
-                            best_match.x1 + 0.5, 
-                            best_match.y1 + 0.5
-                        )
-                        
-                        page.add_redact_annot(safe_rect)
-                        print(f"   ✅ SAFE REMOVAL: ({safe_rect.x0:.1f}, {safe_rect.y0:.1f}) - ({safe_rect.x1:.1f}, {safe_rect.y1:.1f})")
-                        print(f"   📏 Redaction area: {safe_rect.width:.1f} x {safe_rect.height:.1f}")
-                        safe_removals += 1
-                else:
-                    print(f"   ❌ No suitable match found for '{placeholder_text}'")
+                    page.add_redact_annot(safe_rect)
+                    redact_pages.add(page_num)
+                    logger.debug("   ✅ SAFE REMOVAL: (%.1f, %.1f) - (%.1f, %.1f)", safe_rect.x0, safe_rect.y0, safe_rect.x1, safe_rect.y1)
+                    logger.debug("   📏 Redaction area: %.1f x %.1f", safe_rect.width, safe_rect.height)
+                    safe_removals += 1
             else:
-                print(f"   ⚠️ No instances found for '{placeholder_text}'")
+                logger.debug("   ⚠️ No instances found for '%s'", placeholder_text)
         
         except Exception as e:
-            print(f"   ❌ Error processing '{placeholder_text}': {e}")
+            logger.warning("   ❌ Error processing '%s': %s", placeholder_text, e)
     
-    # Apply all redactions
-    for pno in range(len(doc)):
-        page = doc[pno]
-        page.apply_redactions(images=False)
+    # Apply all redactions - her sayfada tek apply, redaksiyonsuz sayfalar yüklenmez bile
+    for pno in sorted(redact_pages):
+        pages[pno].apply_redactions(images=False)
 
     print(f"\n💎 SAFE REMOVAL COMPLETED:")
     print(f"   ✅ Safe removals: {safe_removals}")
     print(f"   ⚠️ Skipped for safety: {skipped_removals}")
     print(f"   🛡️ Content preservation prioritized")
-    
-    return doc
-    
-    # Apply all redactions at once per page
-    for pno in range(len(doc)):
-        page = doc[pno]
-        page.apply_redactions(images=False)
-
-    print("� PRECISE REMOVAL COMPLETED - Only exact placeholder texts removed")
-    return doc
 
 # Yeni fonksiyon
 def embed_font_safe(doc):
@@ -1459,34 +1696,6 @@ def insert_natural_text_advanced(doc: fitz.Document, placeholders: List[Dict], v
     """
     print(f"✨ PERFECT TURKISH TEXT INSERTION: {len(values)} values")
 
-    def _get_turkish_fontfile() -> Optional[str]:
-        # Tüm mevcut fontları öncelik sırasıyla kontrol et
-        font_priorities = [
-            "DejaVuSans.ttf",           # Ana font
-            "NotoSans-Regular.ttf",     # Google font
-            "OpenSans-Regular.ttf",     # Popüler web font
-            "OpenSans-SemiBold.ttf",    # Semi-bold variant
-            "Roboto-Regular.ttf",       # Material design
-            "Ubuntu-Regular.ttf",       # Ubuntu font
-            "PTSans-Regular.ttf",       # PT Sans
-            "BebasNeue-Regular.ttf",    # Modern display
-            "Anton-Regular.ttf",        # Display font
-            "Gravity-Regular.otf",      # Gravity regular
-            "Gravity-Bold.otf",         # Gravity bold  
-            "Amble-Regular.ttf",        # Amble regular
-            "Amble-Bold.ttf",           # Amble bold
-            "CaviarDreams.ttf",         # Caviar Dreams
-            "LemonMilklight.otf",       # Lemon Milk
-            "Akrobat-Regular.otf",      # Akrobat
-            "TTimesb.ttf"               # Times variant
-        ]
-        
-        for font_name in font_priorities:
-            font_path = FONTS_DIR / font_name
-            if font_path.exists():
-                return str(font_path)
-        return None
-
     default_ttf = _get_turkish_fontfile()
     if default_ttf:
         print(f"🇹🇷 Default TTF: {default_ttf}")
@@ -1520,7 +1729,7 @@ def insert_natural_text_advanced(doc: fitz.Document, placeholders: List[Dict], v
         # Öncelik: PDF'in gömülü fontunu çıkarmak
         fontfile_path = _extract_placeholder_fontfile(doc, ph.get("page", 0), original_font) or default_ttf
         if fontfile_path:
-            print(f"🖨️ Font for '{key}': {fontfile_path} (orig: {original_font})")
+            logger.debug("🖨️ Font for '%s': %s (orig: %s)", key, fontfile_path, original_font)
 
         # GÜVENLI PLACEHOLDER BOYUTU (görünürlük garantili)
         # Placeholder yüksekliğinin %60'ı = font size (güvenli doldurma için)
@@ -1529,7 +1738,7 @@ def insert_natural_text_advanced(doc: fitz.Document, placeholders: List[Dict], v
         fs = round(min(base_fs, 24.0), 1)
         # Minimum 8pt garantisi
         fs = max(fs, 8.0)
-        print(f"🎯 SAFE PLACEHOLDER SIZE for '{key}': rect.height={rect.height:.1f} -> font_size={fs:.1f}pt (base={base_fs:.1f})")
+        logger.debug("🎯 SAFE PLACEHOLDER SIZE for '%s': rect.height=%.1f -> font_size=%.1fpt (base=%.1f)", key, rect.height, fs, base_fs)
 
         try:
             if fontfile_path:
@@ -1543,7 +1752,7 @@ def insert_natural_text_advanced(doc: fitz.Document, placeholders: List[Dict], v
                     align=fitz.TEXT_ALIGN_CENTER,
                     color=color
                 )
-                print(f"✅ Placed '{key}' at {fs:.1f}pt within {rect} (TTF, SAFE SIZE)")
+                logger.debug("✅ Placed '%s' at %.1fpt within %s (TTF, SAFE SIZE)", key, fs, rect)
             else:
                 # ASCII fallback (Unicode font yoksa)
                 ascii_map = {'ç':'c','ğ':'g','ı':'i','ö':'o','ş':'s','ü':'u','Ç':'C','Ğ':'G','İ':'I','Ö':'O','Ş':'S','Ü':'U'}
@@ -1556,9 +1765,9 @@ def insert_natural_text_advanced(doc: fitz.Document, placeholders: List[Dict], v
                     align=fitz.TEXT_ALIGN_CENTER,
                     color=color
                 )
-                print(f"✅ Placed '{key}' at {fs:.1f}pt within {rect} (ASCII, SAFE SIZE)")
+                logger.debug("✅ Placed '%s' at %.1fpt within %s (ASCII, SAFE SIZE)", key, fs, rect)
         except Exception as e:
-            print(f"❌ FAILED to place '{key}': {e}")
+            logger.warning("❌ FAILED to place '%s': %s", key, e)
             # Yedek yerleştirme - daha küçük font ile dene
             try:
                 backup_fs = min(12.0, fs * 0.5)
@@ -1582,9 +1791,9 @@ def insert_natural_text_advanced(doc: fitz.Document, placeholders: List[Dict], v
                         align=fitz.TEXT_ALIGN_CENTER,
                         color=color
                     )
-                print(f"⚠️ BACKUP placement '{key}' at {backup_fs:.1f}pt")
+                logger.debug("⚠️ BACKUP placement '%s' at %.1fpt", key, backup_fs)
             except Exception as e2:
-                print(f"❌ BACKUP ALSO FAILED for '{key}': {e2}")
+                logger.warning("❌ BACKUP ALSO FAILED for '%s': %s", key, e2)
 
     print("✨ PERFECT TURKISH TEXT INSERTION COMPLETED")
     return doc
@@ -1613,38 +1822,15 @@ def test_font_unicode_support(font_path: str, test_text: str = "Çağrı Türkç
         return False
 
 
-def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dict], values: Dict[str, str], font_analysis: Dict[str, Any], font_choice: Optional[str] = None, text_color: Optional[List[float]] = None, font_size_mode: str = "auto", fixed_font_size: Optional[float] = None, min_font_size: Optional[float] = None, max_font_size: Optional[float] = None, allow_overflow: bool = False, text_alignments: Dict[str, str] = {}, alignment_offsets: Dict[str, float] = {}, per_placeholder_font_sizes: Dict[str, float] = {}, alignment_offsets_y: Dict[str, float] = {}, font_style: str = "normal", per_placeholder_styles: Dict[str, str] = {}) -> Tuple[fitz.Document, List[Dict[str, Any]]]:
+def _base_key(key: str) -> str:
+    """İndeksli placeholder anahtarının kökü (sitead_1 -> sitead); değerler ve placeholder'lar aynı kuralla eşlenir."""
+    return key.partition('_')[0]
+
+
+def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dict], values: Dict[str, str], font_analysis: Dict[str, Any], font_choice: Optional[str] = None, text_color: Optional[List[float]] = None, font_size_mode: str = "auto", fixed_font_size: Optional[float] = None, min_font_size: Optional[float] = None, max_font_size: Optional[float] = None, allow_overflow: bool = False, text_alignments: Dict[str, str] = {}, alignment_offsets: Dict[str, float] = {}, per_placeholder_font_sizes: Dict[str, float] = {}, alignment_offsets_y: Dict[str, float] = {}, font_style: str = "normal", per_placeholder_styles: Dict[str, str] = {}, line_cache: Optional[Dict[int, Dict]] = None) -> Tuple[fitz.Document, List[Dict[str, Any]]]:
     """Font analizi ile gelişmiş metin yerleştirme sistemi"""
     print(f"✨ PERFECT TURKISH TEXT INSERTION WITH FONT ANALYSIS: {len(values)} values")
 
-    def _get_turkish_fontfile() -> Optional[str]:
-        # Tüm mevcut fontları öncelik sırasıyla kontrol et
-        font_priorities = [
-            "DejaVuSans.ttf",           # Ana font
-            "NotoSans-Regular.ttf",     # Google font
-            "OpenSans-Regular.ttf",     # Popüler web font
-            "OpenSans-SemiBold.ttf",    # Semi-bold variant
-            "Roboto-Regular.ttf",       # Material design
-            "Ubuntu-Regular.ttf",       # Ubuntu font
-            "PTSans-Regular.ttf",       # PT Sans
-            "BebasNeue-Regular.ttf",    # Modern display
-            "Anton-Regular.ttf",        # Display font
-            "Gravity-Regular.otf",      # Gravity regular
-            "Gravity-Bold.otf",         # Gravity bold  
-            "Amble-Regular.ttf",        # Amble regular
-            "Amble-Bold.ttf",           # Amble bold
-            "CaviarDreams.ttf",         # Caviar Dreams
-            "LemonMilklight.otf",       # Lemon Milk
-            "Akrobat-Regular.otf",      # Akrobat
-            "TTimesb.ttf"               # Times variant
-        ]
-        
-        for font_name in font_priorities:
-            font_path = FONTS_DIR / font_name
-            if font_path.exists():
-                return str(font_path)
-        return None
-
     default_ttf = _get_turkish_fontfile()
     if default_ttf:
         print(f"🇹🇷 Default TTF: {default_ttf}")
@@ -1664,42 +1850,56 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
     # Böylece aynı isimli farklı koordinatlardaki placeholder'lar için aynı değer kullanılır.
     base_key_values = {}
     
-    print(f"🚀 BAŞLATILAN VALUES MAPPING:")
+    logger.debug("🚀 BAŞLATILAN VALUES MAPPING:")
     for k, v in values.items():
-        print(f"   📊 '{k}' -> '{v}'")
+        logger.debug("   📊 '%s' -> '%s'", k, v)
         
         # Base key'i çıkar (sitead_1 -> sitead)
-        base_key = k.split('_')[0] if '_' in k else k
+        base_key = _base_key(k)
         if v and v.strip():  # Boş değer değilse
             base_key_values[base_key] = v
     
-    print(f"🔄 BASE KEY VALUES MAPPING:")
-    for k, v in base_key_values.items():
-        print(f"   🎯 '{k}' -> '{v}'")
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("🔄 BASE KEY VALUES MAPPING:")
+        for k, v in base_key_values.items():
+            logger.debug("   🎯 '%s' -> '%s'", k, v)
 
     diagnostics: List[Dict[str, Any]] = []
+    # Sayfa metni çizimden önce bir kez ayrıştırılır; eklenen metin satır genişletmeyi etkilemez.
+    # Çağıran aynı temiz PDF için önceki dolumun önbelleğini verebilir (oturum başına).
+    if line_cache is None:
+        line_cache = {}
+    # Aynı sayfadaki placeholder'lar tek Page nesnesini paylaşır
+    pages: Dict[int, fitz.Page] = {}
+    # Placeholder'dan bağımsız sonuçlar döngü dışında / bir kez hesaplanır: aynı base_key'in
+    # normalize değeri, (sayfa, orijinal font) -> analiz fontu, (font, stil) -> varyant dosyası
+    font_choice_exists = bool(font_choice) and Path(font_choice).exists()
+    normalized_values: Dict[str, str] = {}
+    font_config_cache: Dict[Tuple[int, str], Optional[str]] = {}
+    variant_cache: Dict[Tuple[Optional[str], str], Tuple[Optional[str], List[str]]] = {}
 
     for ph in placeholders:
         key = ph.get("key", "")
-        base_key = key.split('_')[0] if '_' in key else key
-        if base_key not in base_key_values:
-            print(f"❌ NO VALUE found for base key '{base_key}' (key: '{key}')")
-            continue
-
-        raw_val = base_key_values[base_key]
-        text = normalize_turkish_text(raw_val)
+        base_key = _base_key(key)
+        text = normalized_values.get(base_key)
+        if text is None:
+            raw_val = base_key_values.get(base_key)
+            if raw_val is None:
+                logger.debug("❌ NO VALUE found for base key '%s' (key: '%s')", base_key, key)
+                continue
+            text = normalized_values[base_key] = normalize_turkish_text(raw_val)
         if not text:
             continue
 
-        print(f"🎯 PROCESSING: '{key}' (base: '{base_key}') -> '{text[:30]}...'")
+        logger.debug("🎯 PROCESSING: '%s' (base: '%s') -> '%s...'", key, base_key, text[:30])
 
-        page = doc[ph.get("page", 0)]
+        page = _get_page(doc, ph.get("page", 0), pages)
         rect = fitz.Rect(*ph.get("rect", [0, 0, 0, 0]))
 
         # Overflow yoksa satır genişliğine genişlet
         if not allow_overflow:
             try:
-                rect = _expand_rect_to_line(page, rect)
+                rect = _expand_rect_to_line(page, rect, line_cache)
             except Exception:
                 pass
         else:
@@ -1715,7 +1915,7 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
                     min(page_rect.width, cx + expanded_width / 2),
                     min(page_rect.height, cy + expanded_height / 2),
                 )
-                print(f"📏 OVERFLOW MODE for '{key}': Expanded rect to {rect}")
+                logger.debug("📏 OVERFLOW MODE for '%s': Expanded rect to %s", key, rect)
             except Exception:
                 pass
 
@@ -1739,20 +1939,29 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
 
         # Font seçimi: kullanıcı > analiz > default
         fontfile_path = None
-        if font_choice and Path(font_choice).exists():
+        if font_choice_exists:
             fontfile_path = font_choice
         else:
-            try:
-                font_config = get_font_config_for_placeholder(font_analysis, ph)
-                fontfile_path = font_config.get("fontfile") or default_ttf
-            except Exception:
-                fontfile_path = default_ttf
+            config_key = (ph.get("page", 0), ph.get("original_font", ""))
+            if config_key in font_config_cache:
+                fontfile_path = font_config_cache[config_key]
+            else:
+                try:
+                    font_config = get_font_config_for_placeholder(font_analysis, ph)
+                    fontfile_path = font_config.get("fontfile") or default_ttf
+                except Exception:
+                    fontfile_path = default_ttf
+                font_config_cache[config_key] = fontfile_path
 
         # Stil seçimi: per-placeholder > global > normal
         style_for_this = (per_placeholder_styles.get(key) or per_placeholder_styles.get(base_key) or font_style or "normal").lower()
         # Font variantını bulmayı dene
-        tried: List[str] = []
-        styled_fontfile_path = pick_variant_fontfile(fontfile_path, style_for_this, collect=tried)
+        variant_key = (fontfile_path, style_for_this)
+        if variant_key not in variant_cache:
+            collected: List[str] = []
+            variant_cache[variant_key] = (pick_variant_fontfile(fontfile_path, style_for_this, collect=collected), collected)
+        styled_fontfile_path, tried_shared = variant_cache[variant_key]
+        tried: List[str] = list(tried_shared)
 
         # Font boyutu hesapla (tek ölçüm, tek çizim)
         base_fs = round(min(rect.height * 0.60, 24.0), 1)
@@ -1773,13 +1982,19 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
         # Global modes
         if font_size_mode == "fixed" and fixed_font_size and override_size is None:
             fs = float(fixed_font_size)
+            # Açıkça istenen sabit boyut genişliğe göre küçültülmez
+            skip_measure = True
         elif font_size_mode == "min_max" and min_font_size and max_font_size and override_size is None:
             fs = max(float(min_font_size), min(fs, float(max_font_size)))
 
-        measure_fontfile = styled_fontfile_path or fontfile_path
+        # Çizimde kullanılacak fontla ölç: varyant dosyası yoksa çizim Base-14 yedeğiyle yapılır
+        # (onun fitz.Font nesnesi de önbellekten paylaşılır)
+        measure_fontfile = styled_fontfile_path or builtin_fontname_for_style(style_for_this)
+        # Base-14 yedeği ASCII karşılıklarını çizer; ölçülen metin çizilen metinle aynı olmalı
+        draw_text = text if styled_fontfile_path else text.translate(TR_ASCII_TABLE)
         if measure_fontfile and not skip_measure:
             try:
-                measured = _fit_singleline_font_to_rect(text, rect, measure_fontfile, start=fs)
+                measured = _fit_singleline_font_to_rect(draw_text, rect, measure_fontfile, start=fs)
                 if font_size_mode == "min_max" and min_font_size and max_font_size:
                     measured = max(float(min_font_size), min(measured, float(max_font_size)))
                 fs = measured
@@ -1794,10 +2009,13 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
         except Exception:
             manual_offset_y = 0.0
 
-        # Otomatik dikey merkezleme: tek satır için kabaca fs*0.85 yüksekliğini baz al
+        # Otomatik dikey merkezleme: tek satırın gerçek yüksekliği (insert_textbox satır yüksekliğini
+        # fontun ascender-descender farkıyla hesaplar; sabit fs*0.85 tahmini metni aşağı kaydırıyordu)
         auto_center_shift = 0.0
         try:
-            auto_center_shift = (rect.height - (fs * 0.85)) / 2.0
+            font_obj = _get_font_obj(measure_fontfile)
+            line_h = fs * ((font_obj.ascender - font_obj.descender) or 0.85)
+            auto_center_shift = (rect.height - line_h) / 2.0
             # Aşırı kaymaları engelle (±12px ile sınırla)
             if auto_center_shift > 12:
                 auto_center_shift = 12
@@ -1830,17 +2048,15 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
             else:
                 # Built-in styles fallback
                 builtin = builtin_fontname_for_style(style_for_this)
-                ascii_map = {'ç':'c','ğ':'g','ı':'i','ö':'o','ş':'s','ü':'u','Ç':'C','Ğ':'G','İ':'I','Ö':'O','Ş':'S','Ü':'U'}
-                safe_text = ''.join(ascii_map.get(ch, ch) for ch in text)
                 _ = page.insert_textbox(
                     adjusted_rect,
-                    safe_text,
+                    draw_text,
                     fontname=builtin,
                     fontsize=fs,
                     align=alignment,
                     color=color,
                 )
-            print(f"✅ Placed '{key}' once at {fs:.1f}pt within {adjusted_rect}")
+            logger.debug("✅ Placed '%s' once at %.1fpt within %s", key, fs, adjusted_rect)
             diagnostics.append({
                 "key": key,
                 "base_key": base_key,
@@ -1850,11 +2066,10 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
                 "fs": fs,
             })
         except Exception as e:
-            print(f"❌ SINGLE DRAW FAILED for '{key}': {e}")
+            logger.warning("❌ SINGLE DRAW FAILED for '%s': %s", key, e)
             # Minimal tek-seferlik ASCII fallback denemesi
             try:
-                ascii_map = {'ç':'c','ğ':'g','ı':'i','ö':'o','ş':'s','ü':'u','Ç':'C','Ğ':'G','İ':'I','Ö':'O','Ş':'S','Ü':'U'}
-                safe_text = ''.join(ascii_map.get(ch, ch) for ch in text)
+                safe_text = text.translate(TR_ASCII_TABLE)
                 fallback_fs = max(8.0, min(fs, rect.height * 0.5))
                 builtin = builtin_fontname_for_style(style_for_this)
                 _ = page.insert_textbox(
@@ -1865,7 +2080,7 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
                     align=alignment,
                     color=color,
                 )
-                print(f"✅ Fallback placed '{key}' once at {fallback_fs:.1f}pt within {adjusted_rect}")
+                logger.debug("✅ Fallback placed '%s' once at %.1fpt within %s", key, fallback_fs, adjusted_rect)
                 diagnostics.append({
                     "key": key,
                     "base_key": base_key,
@@ -1875,9 +2090,10 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
                     "fs": fallback_fs,
                 })
             except Exception as e2:
-                print(f"❌ Fallback also failed for '{key}': {e2}")
+                logger.warning("❌ Fallback also failed for '%s': %s", key, e2)
 
-    print("✨ PERFECT TURKISH TEXT INSERTION WITH FONT ANALYSIS COMPLETED")
+    # Placeholder başına satırlar DEBUG'da; varsayılan çıktıda tek özet satırı
+    print(f"✨ PERFECT TURKISH TEXT INSERTION WITH FONT ANALYSIS COMPLETED: {len(diagnostics)}/{len(placeholders)} placed")
     return doc, diagnostics
 
 
@@ -1885,253 +2101,115 @@ def insert_natural_text_with_analysis(doc: fitz.Document, placeholders: List[Dic
 def insert_natural_text(doc: fitz.Document, placeholders: List[Dict], values: Dict[str, str]) -> fitz.Document:
     """Ana wrapper fonksiyon - gelişmiş sistemi çağırır"""
     return insert_natural_text_advanced(doc, placeholders, values)
-    print(f"✨ LEGACY-COMPATIBLE TURKISH TEXT INSERTION: {len(values)} values")
 
-    # PyMuPDF version info
-    pymupdf_version = getattr(fitz, '__version__', '0.0.0')
-    print(f"📝 PyMuPDF version: {pymupdf_version}")
-    
-    # Font sistemi
-    has_modern_fonts = hasattr(doc, 'insert_font')
-    print(f"🔧 Modern font support: {has_modern_fonts}")
-    
-    if has_modern_fonts:
-        alias_tr = register_tr_font(doc)
-    else:
-        alias_tr = "helvetica"  # Legacy için default
-    
-    print(f"🇹🇷 Using font: {alias_tr}")
-    alias_cache: Dict[int, str] = {}
 
-    for ph in placeholders:
-        key = ph.get("key", "")
-        if key not in values:
-            continue
-        raw_val = values.get(key, "")
-        text = normalize_turkish_text(raw_val)
-        if not text:
-            continue
+# ============================ API ============================
+# PyMuPDF iş parçacığı güvenli değil: tüm belge işlemleri tek bir işçi iş parçacığında sırayla
+# çalışır; olay döngüsü bu sırada yüklemeleri, önizleme/indirme ve sağlık isteklerini sunar
+_FITZ_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fitz")
+# Yüklenen dosyanın diske yazılması (fitz kullanmaz; belge işleriyle eşzamanlı yürür)
+_UPLOAD_IO_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="upload-io")
 
-        page = doc[ph.get("page", 0)]
-        rect = fitz.Rect(*ph.get("rect", [0, 0, 0, 0]))
+_T = TypeVar("_T")
 
-        # Font bilgilerini al
-        original_font = ph.get("original_font", "helvetica")
-        original_size = ph.get("original_size", 12)
-        original_flags = ph.get("original_flags", 0)
-        original_color = _norm_color(ph.get("original_color", (0, 0, 0)))
-
-        print(f"✨ LEGACY-COMPATIBLE INSERTION:")
-        print(f"   📝 Text: '{text}'")
-        print(f"   🎨 Font: {alias_tr} (original: {original_font})")
-        print(f"   📏 Size: {original_size:.1f}pt")
-        print(f"   📍 Position: ({rect.x0:.1f}, {rect.y1:.1f})")
-
-        # Font boyutu
-        fs = float(original_size)
-        padding = 2.0
-        inner = fitz.Rect(
-            rect.x0 + padding, 
-            rect.y0 + padding, 
-            rect.x1 - padding, 
-            rect.y1 - padding
-        )
 
-        success = False
-        text_needs_unicode = needs_unicode(text)
+async def _run_fitz(func: Callable[..., _T], *args: Any, **kwargs: Any) -> _T:
+    """Senkron PyMuPDF işini olay döngüsünü bloklamadan fitz iş parçacığında çalıştır"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_FITZ_EXECUTOR, functools.partial(func, *args, **kwargs))
 
-        # LEGACY PyMuPDF için özel yaklaşım
-        if not has_modern_fonts:
-            print("🔧 LEGACY PyMuPDF Mode - Special Turkish handling")
-            
-            # Method 1: Direct insert_text için Türkçe karakterleri ASCII'ye çevir
-            if text_needs_unicode:
-                print("🇹🇷 Converting Turkish chars to ASCII for legacy support")
-                # Türkçe karakterleri ASCII karşılıklarına çevir
-                turkish_to_ascii = {
-                    'ç': 'c', 'ğ': 'g', 'ı': 'i', 'ö': 'o', 'ş': 's', 'ü': 'u',
-                    'Ç': 'C', 'Ğ': 'G', 'İ': 'I', 'Ö': 'O', 'Ş': 'S', 'Ü': 'U'
-                }
-                ascii_text = ''.join(turkish_to_ascii.get(char, char) for char in text)
-                print(f"   🔄 '{text}' -> '{ascii_text}' (ASCII conversion)")
-                working_text = ascii_text
-            else:
-                working_text = text
 
-            # Method A: insert_text ile basit yerleştirme
-            try:
-                print(f"� Method A: Legacy insert_text")
-                base_y = rect.y0 + (rect.height * 0.7)  # Y pozisyonu ayarlama
-                
-                page.insert_text(
-                    (rect.x0 + 5, base_y),  # Biraz padding ekle
-                    working_text,
-                    fontname="helvetica",
-                    fontsize=fs,
-                    color=original_color
-                )
-                success = True
-                print(f"✅ Method A SUCCESS: insert_text with helvetica")
-                
-            except Exception as e:
-                print(f"⚠️ Method A failed: {e}")
+def _copy_upload(src: Any, dst: Path) -> None:
+    """Yüklemeyi 1 MiB parçalarla diske akıt; PDF'in tamamı belleğe alınmaz"""
+    with open(dst, "wb") as f:
+        shutil.copyfileobj(src, f, UPLOAD_CHUNK_SIZE)
 
-            # Method B: insert_textbox deneme (legacy'de varsa) - GELİŞTİRİLMİŞ
-            if not success:
-                attempt_count = 0
-                max_attempts = 3
-                current_fs = fs
-                
-                while not success and attempt_count < max_attempts:
-                    attempt_count += 1
-                    try:
-                        print(f"📝 Method B (Attempt {attempt_count}): Legacy insert_textbox at {current_fs:.1f}pt")
-                        result = page.insert_textbox(
-                            inner,
-                            working_text,
-                            fontname="helvetica",
-                            fontsize=current_fs,
-                            align=fitz.TEXT_ALIGN_LEFT,
-                            color=original_color
-                        )
-                        
-                        if result in (0, None, ""):  # Başarılı yerleştirme
-                            success = True
-                            print(f"✅ Method B SUCCESS: insert_textbox at {current_fs:.1f}pt")
-                        else:
-                            print(f"⚠️ Method B overflow: leftover='{result}', reducing font size")
-                            if allow_overflow:
-                                print(f"🚧 OVERFLOW ALLOWED in legacy mode")
-                                success = True
-                            else:
-                                # Font boyutunu küçült
-                                current_fs = max(6.0, current_fs * 0.75)
-                                print(f"📉 Reducing to {current_fs:.1f}pt for next attempt")
-                                
-                                if current_fs <= 6.0:
-                                    print(f"⚠️ Minimum font reached in legacy mode, accepting")
-                                    success = True
-                            
-                    except Exception as e:
-                        print(f"⚠️ Method B attempt {attempt_count} failed: {e}")
-                        current_fs = max(6.0, current_fs * 0.8)
 
-            # Method C: Karakter bazında yerleştirme (legacy)
-            if not success:
-                try:
-                    print(f"📝 Method C: Character-by-character (legacy)")
-                    char_spacing = fs * 0.6
-                    current_x = rect.x0 + 5
-                    base_y = rect.y0 + (rect.height * 0.7)
-
-                    for i, char in enumerate(working_text):
-                        if current_x > rect.x1 - 10:  # Sınır kontrolü
-                            break
-                        try:
-                            page.insert_text(
-                                (current_x, base_y),
-                                char,
-                                fontname="helvetica",
-                                fontsize=fs,
-                                color=original_color
-                            )
-                            current_x += char_spacing
-                        except Exception as char_error:
-                            print(f"⚠️ Character '{char}' failed, skipping")
-                            current_x += char_spacing
-                            continue
-
-                    success = True
-                    print(f"✅ Method C SUCCESS: Character-by-character")
+def _analyze_document(source: Union[bytes, Path], original_path: Path, cleaned_path: Path,
+                      original_written: Optional[Future] = None) -> Tuple[List[Dict], Optional[Dict[str, Any]]]:
+    """Tespit, font analizi, fiziksel silme ve temiz kopyanın kaydı (fitz iş parçacığında).
+    Placeholder yoksa font analizi yapılmaz ve (boş liste, None) döner."""
+    if isinstance(source, bytes):
+        doc = fitz.open(stream=source, filetype="pdf")
+    else:
+        doc = fitz.open(str(source))
+    # Tespit, font analizi ve silme aynı açık belge üzerinde; hata durumunda da kapanır
+    with doc:
+        # Paralel tarama alt süreçleri belgeyi diskten açar; önce dosya yazılmış olmalı
+        if original_written is not None and _detect_workers_for(len(doc)) > 1:
+            original_written.result()
+        # Perfect placeholder detection (korunan alanlar tespitin rawdict'inden, silmede yeniden ayrıştırılmaz)
+        protected_areas: Dict[int, List[Dict]] = {}
+        placeholders = detect_placeholders_position_based(doc, str(original_path), protected_areas)
+        if not placeholders:
+            return placeholders, None
 
-                except Exception as e:
-                    print(f"❌ Method C failed: {e}")
+        # FONT ANALYSIS SYSTEM
+        print("🚀 FONT ANALYSIS PHASE")
+        font_analysis = analyze_pdf_fonts(doc)
 
-            # Method D: Son çare - Türkçe karaktersiz metinle sadece
-            if not success and text_needs_unicode:
-                try:
-                    print(f"📝 Method D: Ultra-safe ASCII only")
-                    # Türkçe karakterleri tamamen çıkar
-                    safe_text = ''.join(c for c in working_text if ord(c) < 128)
-                    if safe_text:
-                        page.insert_text(
-                            (rect.x0 + 5, rect.y0 + (rect.height * 0.7)),
-                            safe_text,
-                            fontname="helvetica",
-                            fontsize=fs,
-                            color=original_color
-                        )
-                        success = True
-                        print(f"✅ Method D SUCCESS: ASCII-only '{safe_text}'")
-                        
-                except Exception as e:
-                    print(f"❌ Method D failed: {e}")
+        # PHASE 1: Physical removal of placeholders
+        print("🚀 PHASE 1: PHYSICAL PLACEHOLDER REMOVAL")
+        physically_remove_placeholders(doc, placeholders, protected_areas)
 
-        # MODERN PyMuPDF desteği (font embedding ile)
-        else:
-            print("🚀 MODERN PyMuPDF Mode - Full Unicode support")
-            
-            # Modern method - önceki kodun aynısı
-            if text_needs_unicode:
-                try:
-                    print(f"🇹🇷 Method MODERN: Unicode font {alias_tr}")
-                    
-                    # Modern textbox insertion
-                    result = page.insert_textbox(
-                        inner,
-                        text,
-                        fontname=alias_tr,
-                        fontsize=fs,
-                        align=fitz.TEXT_ALIGN_LEFT,
-                        color=original_color
-                    )
-                    
-                    if not result:  # No leftover text
-                        success = True
-                        print(f"✅ Method MODERN SUCCESS")
-                    else:
-                        # Try with smaller font
-                        smaller_fs = fs * 0.8
-                        result2 = page.insert_textbox(
-                            inner,
-                            text,
-                            fontname=alias_tr,
-                            fontsize=smaller_fs,
-                            align=fitz.TEXT_ALIGN_LEFT,
-                            color=original_color
-                        )
-                        if not result2:
-                            success = True
-                            print(f"✅ Method MODERN SUCCESS: smaller font")
-                        
-                except Exception as e:
-                    print(f"⚠️ Method MODERN failed: {e}")
+        # Save cleaned version
+        doc.save(str(cleaned_path), **SAVE_OPTIONS)
+    return placeholders, font_analysis
 
-        # Başarı durumu raporu
-        if success:
-            print(f"✅ TEXT INSERTED: '{key}' = '{text}' (legacy compatible)")
-        else:
-            print(f"❌ ALL METHODS FAILED for '{key}' = '{text}'")
-            
-            # Son çare
-            try:
-                safe_text = text[:10] if len(text) <= 20 else f"{text[:10]}..."
-                page.insert_text(
-                    (rect.x0, rect.y0 + rect.height/2),
-                    safe_text,
-                    fontname="helvetica",
-                    fontsize=max(8, fs * 0.7),
-                    color=original_color
-                )
-                print("⚠️ Emergency fallback insertion completed")
-            except Exception as final_error:
-                print(f"❌ EMERGENCY FALLBACK FAILED: {final_error}")
 
-    print("✨ LEGACY-COMPATIBLE TURKISH TEXT INSERTION COMPLETED")
-    return doc
+def _fill_to_file(cleaned_file: str, out_path: Path, placeholders: List[Dict], values: Dict[str, str],
+                  font_analysis: Dict[str, Any], request: FillRequest,
+                  line_cache: Optional[Dict[int, Dict]] = None) -> List[Dict[str, Any]]:
+    """Temiz PDF'in kopyasını doldurup out_path'e kaydeder ve tanılamaları döndürür (fitz iş parçacığında)"""
+    doc = _open_copy_for_fill(cleaned_file, out_path)
+    try:
+        doc, diagnostics = insert_natural_text_with_analysis(
+            doc, placeholders, values, font_analysis, request.font_choice, request.text_color,
+            request.font_size_mode or "auto", request.fixed_font_size, request.min_font_size,
+            request.max_font_size, request.allow_overflow or False, request.text_alignments or {},
+            request.alignment_offsets or {}, request.per_placeholder_font_sizes or {},
+            request.alignment_offsets_y or {}, (request.font_style or "normal").lower(),
+            request.per_placeholder_styles or {},
+            line_cache=line_cache
+        )
+        _save_filled(doc, out_path)
+    finally:
+        try:
+            doc.close()
+        except Exception:
+            pass
+    return diagnostics
+
+
+def _analyze_and_fill_document(source: Union[bytes, Path], request: FillRequest) -> Tuple[Optional[bytes], List[Dict], List[Dict[str, Any]]]:
+    """Tespit, silme ve dolumu tek açık belgede yapıp PDF'i bir kez serileştirir (fitz iş parçacığında).
+    Ara temiz PDF yazılıp yeniden açılmaz. Placeholder yoksa (None, [], []) döner.
+    source: küçük yüklemelerde baytlar, büyüklerde diske akıtılmış dosya (MuPDF dosyadan okur,
+    paralel tarama da aynı dosyayı kullanabilir)."""
+    if isinstance(source, bytes):
+        doc = fitz.open(stream=source, filetype="pdf")
+        source_path = None
+    else:
+        doc = fitz.open(str(source))
+        source_path = str(source)
+    with doc:
+        protected_areas: Dict[int, List[Dict]] = {}
+        placeholders = detect_placeholders_position_based(doc, source_path, protected_areas)
+        if not placeholders:
+            return None, placeholders, []
+        font_analysis = analyze_pdf_fonts(doc)
+        physically_remove_placeholders(doc, placeholders, protected_areas)
+        doc, diagnostics = insert_natural_text_with_analysis(
+            doc, placeholders, request.values or {}, font_analysis, request.font_choice, request.text_color,
+            request.font_size_mode or "auto", request.fixed_font_size, request.min_font_size,
+            request.max_font_size, request.allow_overflow or False, request.text_alignments or {},
+            request.alignment_offsets or {}, request.per_placeholder_font_sizes or {},
+            request.alignment_offsets_y or {}, (request.font_style or "normal").lower(),
+            request.per_placeholder_styles or {}
+        )
+        return doc.tobytes(**SAVE_OPTIONS), placeholders, diagnostics
 
 
-# ============================ API ============================
 class AnalyzeResponse(BaseModel):
     success: bool
     message: str
@@ -2145,23 +2223,39 @@ async def analyze_pdf_perfect(file: UploadFile = File(...)):
     try:
         session_id = str(uuid.uuid4())
         
-        # Save original file
-        file_content = await file.read()
         original_path = SESSION_DIR / f"{session_id}_original.pdf"
-        
-        with open(original_path, "wb") as f:
-            f.write(file_content)
+        cleaned_path = SESSION_DIR / f"{session_id}_cleaned.pdf"
+        write_future: Optional[Future] = None
+        await file.seek(0)
+        if file.size is not None and file.size <= INMEMORY_OPEN_MAX:
+            # Küçük dosya: bir kez belleğe okunur, PDF bu baytlardan açılır; diske yazma
+            # arka planda analizle eşzamanlı sürer (dosya diskten yeniden okunmaz)
+            file_content = await file.read()
+            write_future = _UPLOAD_IO_EXECUTOR.submit(original_path.write_bytes, file_content)
+            source: Union[bytes, Path] = file_content
+        else:
+            # Büyük dosya: parçalarla diske akıtılır, PDF diskten açılır
+            await asyncio.get_running_loop().run_in_executor(_UPLOAD_IO_EXECUTOR, _copy_upload, file.file, original_path)
+            source = original_path
         
         print(f"📁 PERFECT ANALYSIS: {file.filename}")
         
-        # Open PDF for analysis
-        doc = fitz.open(str(original_path))
-        
-        # Perfect placeholder detection
-        placeholders = detect_placeholders_position_based(doc)
+        placeholders: List[Dict] = []
+        try:
+            placeholders, font_analysis = await _run_fitz(
+                _analyze_document, source, original_path, cleaned_path, write_future
+            )
+        finally:
+            # Önizleme/indirme orijinal dosyayı diskten okur
+            if write_future is not None:
+                await asyncio.wrap_future(write_future)
+            # Oturum açılmayacaksa (placeholder yok veya analiz hatası) dosyalar diskte sahipsiz
+            # kalmasın; aksi halde her başarısız yükleme SESSION_DIR'de birikir
+            if not placeholders:
+                for path in (original_path, cleaned_path):
+                    path.unlink(missing_ok=True)
         
         if not placeholders:
-            doc.close()
             return AnalyzeResponse(
                 success=False,
                 message="Bu PDF'de {{}} (süslü parantez) formatında placeholder bulunamadı.",
@@ -2169,21 +2263,6 @@ async def analyze_pdf_perfect(file: UploadFile = File(...)):
                 placeholders=[]
             )
         
-        # FONT ANALYSIS SYSTEM
-        print("🚀 FONT ANALYSIS PHASE")
-        font_analysis = analyze_pdf_fonts(doc)
-        
-        # PHASE 1: Physical removal of placeholders
-        print("🚀 PHASE 1: PHYSICAL PLACEHOLDER REMOVAL")
-        doc = physically_remove_placeholders(doc, placeholders)
-        
-        # Save cleaned version
-        cleaned_path = SESSION_DIR / f"{session_id}_cleaned.pdf"
-        doc.save(str(cleaned_path))
-        
-        # Properly close documents
-        doc.close()
-        
         print(f"💾 PERFECT ANALYSIS COMPLETE: {session_id}")
         
         # Store session with perfect data
@@ -2245,37 +2324,13 @@ async def preview_filled_pdf_perfect(request: FillRequest):
             raise HTTPException(status_code=404, detail="Temizlenmiş PDF bulunamadı")
 
         values = request.values or {}
-        font_choice = request.font_choice
-        text_color = request.text_color
-        font_size_mode = request.font_size_mode or "auto"
-        fixed_font_size = request.fixed_font_size
-        min_font_size = request.min_font_size
-        max_font_size = request.max_font_size
-        allow_overflow = request.allow_overflow or False
-        text_alignments = request.text_alignments or {}
-        alignment_offsets = request.alignment_offsets or {}
-        alignment_offsets_y = request.alignment_offsets_y or {}
-        per_placeholder_font_sizes = request.per_placeholder_font_sizes or {}
-        font_style = (request.font_style or "normal").lower()
-        per_placeholder_styles = request.per_placeholder_styles or {}
-
-        doc = fitz.open(cleaned_file)
-        try:
-            doc, diagnostics = insert_natural_text_with_analysis(
-                doc, placeholders, values, font_analysis, font_choice, text_color,
-                font_size_mode, fixed_font_size, min_font_size, max_font_size,
-                allow_overflow, text_alignments, alignment_offsets, per_placeholder_font_sizes,
-                alignment_offsets_y, font_style, per_placeholder_styles
-            )
-            preview_path = SESSION_DIR / f"{session_id}_preview.pdf"
-            doc.save(str(preview_path))
-            session["preview_file"] = str(preview_path)
-            session["last_diagnostics"] = diagnostics
-        finally:
-            try:
-                doc.close()
-            except Exception:
-                pass
+        preview_path = SESSION_DIR / f"{session_id}_preview.pdf"
+        diagnostics = await _run_fitz(
+            _fill_to_file, cleaned_file, preview_path, placeholders, values, font_analysis, request,
+            line_cache=session.setdefault("line_cache", {})
+        )
+        session["preview_file"] = str(preview_path)
+        session["last_diagnostics"] = diagnostics
 
         # İframe için kullanılacak URL'yi döndür
         return JSONResponse({
@@ -2343,24 +2398,14 @@ async def fill_pdf_perfect(request: FillRequest):
             print(f"📏 Font size range: {min_font_size}pt - {max_font_size}pt")
 
         print("🚀 PHASE 2: NATURAL TEXT INSERTION")
-        doc = fitz.open(cleaned_file)
-        try:
-            doc, diagnostics = insert_natural_text_with_analysis(
-                doc, placeholders, values, font_analysis, font_choice, text_color,
-                font_size_mode, fixed_font_size, min_font_size, max_font_size,
-                allow_overflow, text_alignments, alignment_offsets, per_placeholder_font_sizes,
-                alignment_offsets_y, font_style, per_placeholder_styles
-            )
-            filled_path = SESSION_DIR / f"{session_id}_filled.pdf"
-            doc.save(str(filled_path))
-            session["filled_file"] = str(filled_path)
-            session["last_diagnostics"] = diagnostics
-            print(f"💎 PERFECT FILLING COMPLETE: {filled_path}")
-        finally:
-            try:
-                doc.close()
-            except Exception:
-                pass
+        filled_path = SESSION_DIR / f"{session_id}_filled.pdf"
+        diagnostics = await _run_fitz(
+            _fill_to_file, cleaned_file, filled_path, placeholders, values, font_analysis, request,
+            line_cache=session.setdefault("line_cache", {})
+        )
+        session["filled_file"] = str(filled_path)
+        session["last_diagnostics"] = diagnostics
+        print(f"💎 PERFECT FILLING COMPLETE: {filled_path}")
 
         return JSONResponse({
             "success": True,
@@ -2375,6 +2420,56 @@ async def fill_pdf_perfect(request: FillRequest):
         raise HTTPException(status_code=500, detail=f"Doldurma hatası: {str(e)}")
 
 
+@app.post("/api/analyze_and_fill")
+async def analyze_and_fill_pdf_perfect(file: UploadFile = File(...), values: str = Form(...), options: Optional[str] = Form(None)):
+    """Tek adımda analiz + doldurma (programatik kullanım): değerler yüklemeyle birlikte gelir.
+    values: {"Ad_1": "..."} JSON'u; options: /api/fill gövdesindeki diğer alanlar (JSON, isteğe bağlı).
+    Oturum açılmaz; doldurulmuş PDF doğrudan döner."""
+    try:
+        try:
+            fill_values = json.loads(values)
+            fill_options = json.loads(options) if options else {}
+            request = FillRequest(session_id="", values=fill_values, **fill_options)
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"Geçersiz values/options: {str(e)}")
+
+        print(f"📁 PERFECT ANALYZE+FILL: {file.filename}")
+        upload_path: Optional[Path] = None
+        await file.seek(0)
+        if file.size is not None and file.size <= INMEMORY_OPEN_MAX:
+            source: Union[bytes, Path] = await file.read()
+        else:
+            # Büyük dosya belleğe alınmaz: parçalarla geçici dosyaya akıtılır, PDF oradan açılır
+            upload_path = SESSION_DIR / f"{uuid.uuid4()}_upload.pdf"
+            await asyncio.get_running_loop().run_in_executor(_UPLOAD_IO_EXECUTOR, _copy_upload, file.file, upload_path)
+            source = upload_path
+        try:
+            pdf_bytes, placeholders, diagnostics = await _run_fitz(_analyze_and_fill_document, source, request)
+        finally:
+            if upload_path is not None:
+                upload_path.unlink(missing_ok=True)
+        if pdf_bytes is None:
+            raise HTTPException(status_code=422, detail="Bu PDF'de placeholder bulunamadı.")
+
+        print(f"💎 PERFECT ANALYZE+FILL COMPLETE: {len(placeholders)} placeholders, {len(diagnostics)} filled")
+        return Response(
+            content=pdf_bytes,
+            media_type="application/pdf",
+            headers={
+                "Content-Disposition": "attachment; filename*=utf-8''" + urllib.parse.quote(f"perfect_{Path(file.filename or 'document.pdf').name}"),
+                "X-Placeholders-Detected": str(len(placeholders)),
+                "X-Placeholders-Filled": str(len(diagnostics)),
+            },
+        )
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"❌ Perfect analyze+fill error: {e}")
+        import traceback
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Analiz/doldurma hatası: {str(e)}")
+
+
 @app.get("/api/download/{session_id}")
 async def download_filled_pdf_perfect(session_id: str):
     """PDF indirme"""
@@ -2412,9 +2507,15 @@ async def get_font_analysis(session_id: str):
     # Mevcut yerel fontları da ekle
     available_fonts = []
     
-    # PDF'den çıkarılan fontlar
+    # PDF'den çıkarılan fontlar: embedded_fonts sayfa başına bir kayıt tutar; aynı xref
+    # (aynı id ve dosya) listede bir kez, ilk görüldüğü sayfayla yer alır
+    seen_xrefs = set()
     for f in font_analysis.get("embedded_fonts", []):
+        xref = f.get("xref", 0)
+        if xref in seen_xrefs:
+            continue
         if f.get("file_path"):
+            seen_xrefs.add(xref)
             available_fonts.append({
                 "id": f"extracted_{f.get('xref', 0)}",
                 "name": f.get("basename") or f.get("name", "Unknown"),
@@ -2432,9 +2533,7 @@ async def get_font_analysis(session_id: str):
         except Exception:
             return stem
     try:
-        for fp in FONTS_DIR.glob("**/*"):
-            if fp.suffix.lower() not in (".ttf", ".otf"):
-                continue
+        for fp in _local_font_files():
             if not fp.exists():
                 continue
             available_fonts.append({